@@ -0,0 +1,37 @@
+"""add indexes for list endpoint filters
+
+Revision ID: add_list_indexes
+Revises: create_llm_systems
+Create Date: 2026-10-15 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_list_indexes'
+down_revision = 'create_llm_systems'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: tables and indexes may already have been created by
+    # Base.metadata.create_all at application startup
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_runs_prompt_id_created_at "
+        "ON runs (prompt_id, created_at DESC)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_prompts_project_id_status "
+        "ON prompts (project_id, status)"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_projects_status ON projects (status)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_projects_tags ON projects USING gin (tags)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_projects_tags")
+    op.execute("DROP INDEX IF EXISTS ix_projects_status")
+    op.execute("DROP INDEX IF EXISTS ix_prompts_project_id_status")
+    op.execute("DROP INDEX IF EXISTS ix_runs_prompt_id_created_at")
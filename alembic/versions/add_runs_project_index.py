@@ -0,0 +1,27 @@
+"""add runs (project_id, created_at) index
+
+Revision ID: add_runs_project_index
+Revises: llm_systems_available_models_jsonb
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_runs_project_index'
+down_revision = 'llm_systems_available_models_jsonb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: create_all may already have built the index at startup
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_runs_project_id_created_at "
+        "ON runs (project_id, created_at DESC)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_runs_project_id_created_at")
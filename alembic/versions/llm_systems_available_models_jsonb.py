@@ -0,0 +1,43 @@
+"""store llm_systems.available_models as jsonb
+
+Revision ID: llm_systems_available_models_jsonb
+Revises: add_list_indexes
+Create Date: 2026-10-15 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'llm_systems_available_models_jsonb'
+down_revision = 'add_list_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.alter_column(
+        'llm_systems',
+        'available_models',
+        type_=postgresql.JSONB(),
+        existing_nullable=False,
+        postgresql_using='available_models::jsonb'
+    )
+    # IF NOT EXISTS: create_all may already have built the index at startup
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_llm_systems_available_models "
+        "ON llm_systems USING gin (available_models)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_llm_systems_available_models")
+    op.alter_column(
+        'llm_systems',
+        'available_models',
+        type_=sa.String(),
+        existing_nullable=False,
+        postgresql_using='available_models::text'
+    )
@@ -0,0 +1,47 @@
+"""store runs/settings timestamps as timestamptz with server defaults
+
+Revision ID: timestamptz_runs_settings
+Revises: add_runs_project_index
+Create Date: 2026-10-15 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'timestamptz_runs_settings'
+down_revision = 'add_runs_project_index'
+branch_labels = None
+depends_on = None
+
+# Existing values were written with datetime.utcnow()
+COLUMNS = [
+    ('runs', 'created_at'),
+    ('settings', 'created_at'),
+    ('settings', 'updated_at'),
+]
+
+
+def upgrade() -> None:
+    for table, column in COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.DateTime(timezone=True),
+            existing_nullable=False,
+            server_default=sa.func.now(),
+            postgresql_using=f"{column} AT TIME ZONE 'UTC'"
+        )
+
+
+def downgrade() -> None:
+    for table, column in COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.DateTime(),
+            existing_nullable=False,
+            server_default=None,
+            postgresql_using=f"{column} AT TIME ZONE 'UTC'"
+        )
@@ -0,0 +1,34 @@
+# app/api/deps.py
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.services.llm_system_service import LLMSystemService
+from app.services.project import ProjectService
+from app.services.prompt import PromptService
+from app.services.run_service import RunService
+from app.services.settings import SettingsService
+
+# Service providers. FastAPI caches dependencies per request, so every
+# endpoint parameter asking for the same provider shares one instance
+# bound to the request's session.
+
+
+def get_project_service(db: AsyncSession = Depends(get_db)) -> ProjectService:
+    return ProjectService(db)
+
+
+def get_prompt_service(db: AsyncSession = Depends(get_db)) -> PromptService:
+    return PromptService(db)
+
+
+def get_settings_service(db: AsyncSession = Depends(get_db)) -> SettingsService:
+    return SettingsService(db)
+
+
+def get_llm_system_service(db: AsyncSession = Depends(get_db)) -> LLMSystemService:
+    return LLMSystemService(db)
+
+
+def get_run_service(db: AsyncSession = Depends(get_db)) -> RunService:
+    return RunService(db)
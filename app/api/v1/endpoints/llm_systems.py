@@ -1,19 +1,20 @@
 from typing import List
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi_cache.decorator import cache
 
-from app.core.database import get_db
+from app.api.deps import get_llm_system_service
+from app.core.cache import LLM_SYSTEMS_NAMESPACE, request_key_builder
 from app.services.llm_system_service import LLMSystemService
 from app.schemas.llm_system import LLMSystem
 
 router = APIRouter()
 
 @router.get("/", response_model=List[LLMSystem])
-def get_all_llm_systems(
-    db: Session = Depends(get_db)
+@cache(expire=300, namespace=LLM_SYSTEMS_NAMESPACE, key_builder=request_key_builder)
+async def get_all_llm_systems(
+    service: LLMSystemService = Depends(get_llm_system_service)
 ) -> List[LLMSystem]:
     """
     Retrieve all LLM systems.
     """
-    service = LLMSystemService(db)
-    return service.list_all()
+    return [LLMSystem.model_validate(s) for s in await service.list_all()]
@@ -1,9 +1,12 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, Query, Path
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Path, Request
+from fastapi.responses import ORJSONResponse
+from fastapi_cache.decorator import cache
 from loguru import logger
 
-from app.core.database import get_db
+from app.api.deps import get_project_service
+from app.core.cache import PROJECTS_NAMESPACE, PROMPTS_NAMESPACE, invalidate, request_key_builder
+from app.core.etag import etag_matches, make_etag, not_modified, set_cache_headers
 from app.schemas.project import ProjectCreate, ProjectUpdate, Project, ProjectStatus
 from app.services.project import ProjectService
 from app.core.exceptions import NotFoundError, ValidationError
@@ -11,59 +14,81 @@ from app.core.exceptions import NotFoundError, ValidationError
 router = APIRouter()
 
 @router.post("/", response_model=Project, status_code=201)
-def create_project(
+async def create_project(
     project: ProjectCreate,
-    db: Session = Depends(get_db)
+    service: ProjectService = Depends(get_project_service)
 ):
     """Create a new project"""
-    service = ProjectService(db)
-    return service.create_project(project)
+    db_project = await service.create_project(project)
+    await invalidate(PROJECTS_NAMESPACE)
+    return db_project
 
-@router.get("/{project_id}", response_model=Project)
-def get_project(
+@router.get(
+    "/{project_id}",
+    response_model=None,
+    responses={200: {"model": Project, "description": "The project"}}
+)
+async def get_project(
+    request: Request,
     project_id: int = Path(..., title="The ID of the project to get", ge=1),
-    db: Session = Depends(get_db)
+    service: ProjectService = Depends(get_project_service)
 ):
-    """Get a specific project by ID"""
-    service = ProjectService(db)
-    return service.get_project(project_id)
+    """Get a specific project by ID, answering 304 if the client's copy is current"""
+    last_modified, prompt_count = await service.get_project_version(project_id)
+    etag = make_etag("project", project_id, last_modified, prompt_count)
+    if etag_matches(request, etag):
+        return not_modified(etag, last_modified)
+    # Built from trusted rows without validation; returning the response
+    # directly also skips FastAPI's response_model validation pass
+    project = Project.from_orm_trusted(await service.get_project(project_id))
+    response = ORJSONResponse(content=project.model_dump())
+    set_cache_headers(response, etag, last_modified)
+    return response
 
-@router.get("/", response_model=List[Project])
-def list_projects(
+@router.get(
+    "/",
+    response_model=None,
+    responses={200: {"model": List[Project], "description": "List of projects"}}
+)
+@cache(expire=10, namespace=PROJECTS_NAMESPACE, key_builder=request_key_builder)
+async def list_projects(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     status: Optional[ProjectStatus] = None,
     tag: Optional[str] = None,
-    db: Session = Depends(get_db)
+    service: ProjectService = Depends(get_project_service)
 ):
     """List projects with optional filtering"""
-    service = ProjectService(db)
-    return service.get_projects(skip=skip, limit=limit, status=status, tag=tag)
+    projects = await service.get_projects(skip=skip, limit=limit, status=status, tag=tag)
+    return ORJSONResponse(content=[Project.from_orm_trusted(p).model_dump() for p in projects])
 
 @router.put("/{project_id}", response_model=Project)
-def update_project(
+async def update_project(
     project_id: int = Path(..., title="The ID of the project to update", ge=1),
     project: ProjectUpdate = None,
-    db: Session = Depends(get_db)
+    service: ProjectService = Depends(get_project_service)
 ):
     """Update a project"""
-    service = ProjectService(db)
-    return service.update_project(project_id, project)
+    db_project = await service.update_project(project_id, project)
+    await invalidate(PROJECTS_NAMESPACE)
+    return db_project
 
 @router.delete("/{project_id}", status_code=204)
-def delete_project(
+async def delete_project(
     project_id: int = Path(..., title="The ID of the project to delete", ge=1),
-    db: Session = Depends(get_db)
+    service: ProjectService = Depends(get_project_service)
 ):
     """Delete a project"""
-    service = ProjectService(db)
-    service.delete_project(project_id)
+    await service.delete_project(project_id)
+    # Deleting a project cascades to its prompts
+    await invalidate(PROJECTS_NAMESPACE, PROMPTS_NAMESPACE)
 
 @router.post("/{project_id}/increment-prompt", response_model=Project)
-def increment_prompt_count(
+async def increment_prompt_count(
     project_id: int = Path(..., title="The ID of the project to increment prompt count", ge=1),
-    db: Session = Depends(get_db)
+    service: ProjectService = Depends(get_project_service)
 ):
     """Increment the prompt count for a project"""
-    service = ProjectService(db)
-    return service.increment_prompt_count(project_id)
+    db_project = await service.increment_prompt_count(project_id)
+    await invalidate(PROJECTS_NAMESPACE)
+    return db_project
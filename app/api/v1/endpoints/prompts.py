@@ -1,21 +1,24 @@
 from typing import List, Optional, Sequence, Union
 
-from fastapi import APIRouter, Depends, Path, HTTPException
+from fastapi import APIRouter, Depends, Path, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
+from fastapi_cache.decorator import cache
 from loguru import logger
-from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.api.deps import get_project_service, get_prompt_service
+from app.core.cache import PROJECTS_NAMESPACE, PROMPTS_NAMESPACE, invalidate, request_key_builder
+from app.core.etag import etag_matches, make_etag, not_modified, set_cache_headers
 from app.core.exceptions import NotFoundError, ValidationError
-from app.schemas.prompt import Prompt, PromptCreate, PromptUpdate, PromptStatus, PromptVersion
+from app.schemas.prompt import Prompt, PromptCreate, PromptUpdate, PromptStatus, PromptSummary, PromptVersion
 from app.services.project import ProjectService
 from app.services.prompt import PromptService
 
 router = APIRouter()
 
 @router.post("/", response_model=Prompt, status_code=201)
-def create_prompt(
+async def create_prompt(
     prompt: PromptCreate,
-    db: Session = Depends(get_db)
+    service: PromptService = Depends(get_prompt_service)
 ):
     """
     Create a new prompt.
@@ -56,96 +59,120 @@ def create_prompt(
         404: Project not found
         500: Database error
     """
-    service = PromptService(db)
-    return service.create(prompt)
+    db_prompt = await service.create(prompt)
+    # Project responses embed their prompts
+    await invalidate(PROMPTS_NAMESPACE, PROJECTS_NAMESPACE)
+    return db_prompt
 
-@router.get("/{prompt_id}", response_model=Prompt)
-def get_prompt(
+@router.get(
+    "/{prompt_id}",
+    response_model=None,
+    responses={200: {"model": Prompt, "description": "The prompt"}}
+)
+async def get_prompt(
+    request: Request,
     prompt_id: int = Path(..., title="The ID of the prompt to get", ge=1),
-    db: Session = Depends(get_db)
+    service: PromptService = Depends(get_prompt_service)
 ):
-    """Get a specific prompt by ID"""
-    service = PromptService(db)
-    prompt = service.get(prompt_id)
+    """Get a specific prompt by ID, answering 304 if the client's copy is current"""
+    last_modified = await service.get_last_modified(prompt_id)
+    if last_modified is None:
+        raise NotFoundError(detail=f"Prompt {prompt_id} not found")
+    etag = make_etag("prompt", prompt_id, last_modified)
+    if etag_matches(request, etag):
+        return not_modified(etag, last_modified)
+    prompt = await service.get(prompt_id)
     if not prompt:
         raise NotFoundError(detail=f"Prompt {prompt_id} not found")
-    return prompt
+    # Built from a trusted row without validation; returning the response
+    # directly also skips FastAPI's response_model validation pass
+    response = ORJSONResponse(content=Prompt.from_orm_trusted(prompt).model_dump())
+    set_cache_headers(response, etag, last_modified)
+    return response
 
-@router.get("/project/{project_id}", response_model=List[Prompt])
-def list_project_prompts(
+@router.get(
+    "/project/{project_id}",
+    response_model=None,
+    responses={200: {"model": List[Prompt], "description": "List of prompts"}}
+)
+@cache(expire=10, namespace=PROMPTS_NAMESPACE, key_builder=request_key_builder)
+async def list_project_prompts(
     project_id: int = Path(..., title="The ID of the project to get prompts for", ge=1),
     status: Optional[PromptStatus] = None,
-    db: Session = Depends(get_db)
+    project_service: ProjectService = Depends(get_project_service),
+    service: PromptService = Depends(get_prompt_service)
 ):
     """List all prompts for a project with optional status filter"""
     # Verify project exists
-    project_service = ProjectService(db)
-    project = project_service.get_project(project_id)
-    if not project:
+    if not await project_service.project_exists(project_id):
         raise NotFoundError(detail=f"Project {project_id} not found")
     
-    service = PromptService(db)
-    prompts = service.get_by_project(project_id)
-    
-    # Filter by status if provided
-    if status:
-        prompts = [p for p in prompts if p.status == status]
+    prompts = await service.get_by_project(project_id, status=status)
     
-    return prompts
+    # Built from trusted rows without validation; returning the response
+    # directly also skips FastAPI's response_model validation pass
+    return ORJSONResponse(content=[Prompt.from_orm_trusted(p).model_dump() for p in prompts])
+
+@router.get("/project/{project_id}/summary", response_model=List[PromptSummary])
+async def list_project_prompt_summaries(
+    project_id: int = Path(..., title="The ID of the project to get prompts for", ge=1),
+    cursor: Optional[int] = Query(None, description="Smallest prompt ID of the previous page", ge=1),
+    limit: int = Query(100, ge=1, le=500),
+    service: PromptService = Depends(get_prompt_service)
+):
+    """List one page of prompt summaries for a project, newest first"""
+    return await service.list_summary(project_id, cursor=cursor, limit=limit)
 
 @router.put("/{prompt_id}", response_model=Prompt)
-def update_prompt(
+async def update_prompt(
     prompt_id: int = Path(..., title="The ID of the prompt to update", ge=1),
     prompt: PromptUpdate = None,
-    db: Session = Depends(get_db)
+    service: PromptService = Depends(get_prompt_service)
 ):
     """Update a prompt"""
-    service = PromptService(db)
-    return service.update(prompt_id, prompt)
+    db_prompt = await service.update(prompt_id, prompt)
+    await invalidate(PROMPTS_NAMESPACE, PROJECTS_NAMESPACE)
+    return db_prompt
 
 @router.delete("/{prompt_id}", status_code=204)
-def delete_prompt(
+async def delete_prompt(
     prompt_id: int = Path(..., title="The ID of the prompt to delete", ge=1),
-    db: Session = Depends(get_db)
+    service: PromptService = Depends(get_prompt_service)
 ):
     """Delete a prompt"""
-    service = PromptService(db)
-    service.delete(prompt_id)
+    await service.delete(prompt_id)
+    await invalidate(PROMPTS_NAMESPACE, PROJECTS_NAMESPACE)
 
 @router.get("/{prompt_id}/versions", response_model=List[PromptVersion])
-def list_prompt_versions(
+@cache(expire=10, namespace=PROMPTS_NAMESPACE, key_builder=request_key_builder)
+async def list_prompt_versions(
     prompt_id: int = Path(..., title="The ID of the prompt to get versions for", ge=1),
-    db: Session = Depends(get_db)
-):
+    service: PromptService = Depends(get_prompt_service)
+) -> List[PromptVersion]:
     """List all versions of a prompt"""
-    service = PromptService(db)
-    return service.get_versions(prompt_id)
+    return [PromptVersion.model_validate(v) for v in await service.get_versions(prompt_id)]
 
 @router.get("/{prompt_id}/version/{version}", response_model=PromptVersion)
-def get_prompt_version(
+async def get_prompt_version(
     prompt_id: int = Path(..., title="The ID of the prompt", ge=1),
     version: int = Path(..., title="The version number to get", ge=1),
-    db: Session = Depends(get_db)
+    service: PromptService = Depends(get_prompt_service)
 ):
     """Get a specific version of a prompt"""
-    service = PromptService(db)
-    prompt_version = service.get_version(prompt_id, version)
+    prompt_version = await service.get_version(prompt_id, version)
     if not prompt_version:
         raise NotFoundError(detail=f"Version {version} of prompt {prompt_id} not found")
     
-    # Add prompt details to version
-    prompt = service.get(prompt_id)
-    prompt_version.prompt_name = prompt.name
-    prompt_version.prompt_description = prompt.description
-    prompt_version.project_id = prompt.project_id
-    
+    # Prompt details (name, description, project_id) come from the eager-loaded
+    # prompt relationship on the version
     return prompt_version
 
 @router.post("/{prompt_id}/publish", response_model=Prompt)
-def publish_prompt(
+async def publish_prompt(
     prompt_id: int = Path(..., title="The ID of the prompt to publish", ge=1),
-    db: Session = Depends(get_db)
+    service: PromptService = Depends(get_prompt_service)
 ):
     """Publish a prompt"""
-    service = PromptService(db)
-    return service.publish(prompt_id)
+    db_prompt = await service.publish(prompt_id)
+    await invalidate(PROMPTS_NAMESPACE, PROJECTS_NAMESPACE)
+    return db_prompt
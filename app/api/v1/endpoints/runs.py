@@ -1,12 +1,15 @@
-from typing import List
+import base64
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, Body
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Path, Body
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
 
-from app.core.database import get_db
+from app.api.deps import get_run_service
+from app.core.exceptions import ValidationError
 from app.services.run_service import RunService
 from app.schemas.run import Run, RunCreate
-from app.core.exceptions import AppException, NotFoundError, ValidationError
 
 router = APIRouter(
     tags=["runs"],
@@ -16,8 +19,41 @@ router = APIRouter(
     }
 )
 
+# Validates and dumps a whole page of runs in one pydantic-core call
+_RUN_LIST_ADAPTER = TypeAdapter(List[Run])
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _encode_cursor(created_at: datetime, run_id: int) -> str:
+    """
+    Encode a run's keyset position as an opaque cursor for X-Next-Cursor
+
+    The cursor is unpadded base64url of "<epoch microseconds>_<id>", so it
+    is safe in a query string unescaped and needs no ISO 8601 parsing.
+    """
+    # created_at is timestamptz; read naive values as UTC
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    micros = (created_at - _EPOCH) // _MICROSECOND
+    return base64.urlsafe_b64encode(f"{micros}_{run_id}".encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor made by _encode_cursor into (created_at, id)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        micros, _, run_id = raw.partition("_")
+        return _EPOCH + int(micros) * _MICROSECOND, int(run_id)
+    except (ValueError, OverflowError):
+        # binascii.Error and UnicodeDecodeError are both ValueErrors
+        raise ValidationError(f"Invalid cursor: {cursor}")
+
+
 @router.post("", response_model=Run, status_code=201)
-def create_run(
+async def create_run(
     *,
     run_in: RunCreate = Body(
         ...,
@@ -68,7 +104,7 @@ def create_run(
             }
         }
     ),
-    db: Session = Depends(get_db)
+    run_service: RunService = Depends(get_run_service)
 ):
     """
     Create a new run for a prompt.
@@ -78,7 +114,7 @@ def create_run(
 
     Args:
         run_in: The run creation parameters including optional version number
-        db: Database session
+        run_service: Run service bound to the request's database session
 
     Returns:
         Run: The created run object
@@ -88,26 +124,41 @@ def create_run(
         400: If the input variables are invalid
         500: If there's an internal server error
     """
-    try:
-        run_service = RunService(db)
-        return run_service.create_run(
-            prompt_id=run_in.prompt_id,
-            project_id=run_in.project_id,
-            input_variables=run_in.input_variables,
-            structured_output=run_in.structured_output,
-            model=run_in.model,
-            version=run_in.version
-        )
-    except (NotFoundError, ValidationError) as e:
-        raise HTTPException(
-            status_code=404 if isinstance(e, NotFoundError) else 400,
-            detail=str(e)
-        )
-    except AppException as e:
-        raise HTTPException(status_code=e.status_code, detail=e.detail)
-
-@router.get("/{prompt_id}/list", response_model=List[Run])
-def list_runs(
+    db_run = await run_service.create_run(
+        prompt_id=run_in.prompt_id,
+        project_id=run_in.project_id,
+        input_variables=run_in.input_variables,
+        structured_output=run_in.structured_output,
+        model=run_in.model,
+        version=run_in.version
+    )
+    return db_run
+
+@router.post("/bulk", response_model=List[Run], status_code=201)
+async def create_runs_bulk(
+    *,
+    runs_in: List[RunCreate] = Body(..., min_length=1, max_length=100),
+    run_service: RunService = Depends(get_run_service)
+):
+    """
+    Create several runs in one request, e.g. for evaluation batches.
+
+    Each run is executed like `POST /runs`; all of them are saved in a single
+    transaction, so if one fails none are stored.
+
+    Raises:
+        404: If a prompt or specified version is not found
+        400: If the input variables are invalid
+        500: If there's an internal server error
+    """
+    return await run_service.create_runs_bulk(runs_in)
+
+@router.get(
+    "/{prompt_id}/list",
+    response_model=None,
+    responses={200: {"model": List[Run], "description": "List of runs"}}
+)
+async def list_runs(
     prompt_id: int = Path(..., description="ID of the prompt to list runs for", example=1),
     skip: int = Query(
         0, 
@@ -127,20 +178,31 @@ def list_runs(
         description="If True, returns latest runs first",
         example=True
     ),
-    db: Session = Depends(get_db)
-):
+    cursor: Optional[str] = Query(
+        None,
+        description="Opaque cursor from the previous page's X-Next-Cursor header. "
+                    "Recommended over skip for deep pagination; skip is ignored when set",
+        example="MTczNTMxOTQwMDAwMDAwMF80Mg"
+    ),
+    run_service: RunService = Depends(get_run_service)
+) -> ORJSONResponse:
     """
     List all runs for a specific prompt with pagination support.
 
     This endpoint returns a paginated list of runs for a given prompt ID.
     The results can be ordered by creation time (latest first or oldest first).
 
+    Pagination is keyset-based when `cursor` is given: when a full page is
+    returned, the `X-Next-Cursor` response header holds the cursor for the
+    next page. `skip` still works but gets slower the deeper it pages.
+
     Args:
         prompt_id: ID of the prompt to list runs for
         skip: Number of records to skip (for pagination)
         limit: Maximum number of records to return
         order_by_latest: If True, returns latest runs first
-        db: Database session
+        cursor: X-Next-Cursor of the previous page; returns the runs after it
+        run_service: Run service bound to the request's database session
 
     Returns:
         List[Run]: List of run objects
@@ -155,9 +217,9 @@ def list_runs(
         GET /runs/1/list?skip=0&limit=10&order_by_latest=true
         ```
 
-        Get next page of runs:
+        Get next page of runs using the X-Next-Cursor header:
         ```
-        GET /runs/1/list?skip=10&limit=10&order_by_latest=true
+        GET /runs/1/list?limit=10&order_by_latest=true&cursor=MTczNTMxOTQwMDAwMDAwMF80Mg
         ```
 
         Get oldest runs first:
@@ -165,10 +227,18 @@ def list_runs(
         GET /runs/1/list?skip=0&limit=10&order_by_latest=false
         ```
     """
-    try:
-        run_service = RunService(db)
-        return run_service.get_runs_by_prompt(prompt_id, skip, limit, order_by_latest)
-    except NotFoundError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except AppException as e:
-        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    runs = await run_service.get_runs_by_prompt(
+        prompt_id, skip, limit, order_by_latest, _decode_cursor(cursor) if cursor else None
+    )
+    headers = (
+        {"X-Next-Cursor": _encode_cursor(runs[-1].created_at, runs[-1].id)}
+        if len(runs) == limit else None
+    )
+    # Validated once here; returning the response directly skips FastAPI's
+    # second response_model validation pass
+    return ORJSONResponse(
+        content=_RUN_LIST_ADAPTER.dump_python(
+            _RUN_LIST_ADAPTER.validate_python(runs, from_attributes=True)
+        ),
+        headers=headers
+    )
@@ -1,54 +1,80 @@
 from typing import List
-from fastapi import APIRouter, Depends, Path
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Path, Request, Response
 
-from app.core.database import get_db
+from app.api.deps import get_settings_service
+from app.core.cache import API_KEYS_CHANNEL, publish
+from app.core.etag import etag_matches, make_etag, not_modified, set_cache_headers
+from app.core.exceptions import NotFoundError
 from app.schemas.settings import SettingResponse, SettingCreate, SettingUpdate
+from app.services.llama_service import LlamaService
 from app.services.settings import SettingsService
 
 router = APIRouter(tags=["settings"])
 
 
+async def _clear_api_keys() -> None:
+    """Drop the decrypted API keys cached by this and every other worker"""
+    LlamaService.clear_api_keys()
+    await publish(API_KEYS_CHANNEL)
+
+
+# Not cached in Redis: responses carry decrypted config values, which
+# must not leave the process in plaintext
 @router.get("/", response_model=List[SettingResponse])
-def list_settings(db: Session = Depends(get_db)):
+async def list_settings(
+    service: SettingsService = Depends(get_settings_service)
+) -> List[SettingResponse]:
     """List all settings"""
-    service = SettingsService(db)
-    return service.list_all()
+    return [SettingResponse.model_validate(s) for s in await service.list_all()]
 
 
 @router.get("/{setting_id}", response_model=SettingResponse)
-def get_setting(
+async def get_setting(
+    request: Request,
+    response: Response,
     setting_id: int = Path(..., title="The ID of the setting to get", ge=1),
-    db: Session = Depends(get_db)
+    service: SettingsService = Depends(get_settings_service)
 ):
-    """Get a specific setting by ID"""
-    service = SettingsService(db)
-    return service.get(setting_id)
+    """Get a specific setting by ID, answering 304 if the client's copy is current"""
+    last_modified = await service.get_last_modified(setting_id)
+    if last_modified is None:
+        raise NotFoundError(detail=f"Setting {setting_id} not found")
+    etag = make_etag("setting", setting_id, last_modified)
+    if etag_matches(request, etag):
+        return not_modified(etag, last_modified)
+    set_cache_headers(response, etag, last_modified)
+    return await service.get(setting_id)
 
 
 @router.post("/", response_model=SettingResponse)
-def create_setting(setting: SettingCreate, db: Session = Depends(get_db)):
+async def create_setting(
+    setting: SettingCreate,
+    service: SettingsService = Depends(get_settings_service)
+):
     """Create a new setting"""
-    service = SettingsService(db)
-    return service.create(setting)
+    db_setting = await service.create(setting)
+    # API keys are settings; drop the decrypted copies LlamaService holds
+    await _clear_api_keys()
+    return db_setting
 
 
 @router.patch("/{setting_id}", response_model=SettingResponse)
-def update_setting(
+async def update_setting(
     setting_id: int = Path(..., title="The ID of the setting to update", ge=1),
     setting: SettingUpdate = None,
-    db: Session = Depends(get_db)
+    service: SettingsService = Depends(get_settings_service)
 ):
     """Update a setting"""
-    service = SettingsService(db)
-    return service.update(setting_id, setting)
+    db_setting = await service.update(setting_id, setting)
+    await _clear_api_keys()
+    return db_setting
 
 
 @router.delete("/{setting_id}", status_code=204)
-def delete_setting(
+async def delete_setting(
     setting_id: int = Path(..., title="The ID of the setting to delete", ge=1),
-    db: Session = Depends(get_db)
+    service: SettingsService = Depends(get_settings_service)
 ):
     """Delete a setting"""
-    service = SettingsService(db)
-    service.delete(setting_id)
+    await service.delete(setting_id)
+    await _clear_api_keys()
@@ -0,0 +1,115 @@
+# app/core/cache.py
+import asyncio
+import inspect
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+from fastapi import Request, Response
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+from loguru import logger
+from redis import asyncio as aioredis
+
+from app.core.config import settings
+
+CACHE_PREFIX = "pm-cache"
+
+# Cache namespaces, one per resource. Writes clear the namespaces whose
+# cached reads they can change.
+LLM_SYSTEMS_NAMESPACE = "llm-systems"
+PROJECTS_NAMESPACE = "projects"
+PROMPTS_NAMESPACE = "prompts"
+# LLM outputs of recent runs, read and written by RunService
+RUNS_NAMESPACE = "runs"
+
+# Pub/sub channel telling every worker to drop its decrypted API keys
+API_KEYS_CHANNEL = f"{CACHE_PREFIX}:api-keys-changed"
+# Pub/sub channel telling every worker to reload its LLM systems
+LLM_SYSTEMS_CHANNEL = f"{CACHE_PREFIX}:llm-systems-changed"
+
+# Seconds to wait before resubscribing after losing the Redis connection
+_RESUBSCRIBE_DELAY_SECONDS = 5
+
+_redis: Optional[aioredis.Redis] = None
+
+
+def init_cache() -> None:
+    """Initialize the Redis-backed response cache"""
+    global _redis
+    _redis = aioredis.from_url(settings.REDIS_URL)
+    FastAPICache.init(RedisBackend(_redis), prefix=CACHE_PREFIX)
+
+
+def request_key_builder(
+        func: Callable[..., Any],
+        namespace: str = "",
+        *,
+        request: Optional[Request] = None,
+        response: Optional[Response] = None,
+        args: Tuple[Any, ...] = (),
+        kwargs: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Build a cache key from the endpoint and its request URL.
+
+    The default key builder hashes all call kwargs, which include the
+    per-request database session and would never produce a hit.
+    """
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f"{namespace}:{func.__module__}:{func.__name__}:{request.url.path}?{query}"
+
+
+async def invalidate(*namespaces: str) -> None:
+    """Clear cached responses for the given namespaces"""
+    for namespace in namespaces:
+        try:
+            await FastAPICache.clear(namespace=namespace)
+        except Exception as e:
+            logger.warning(f"Failed to clear cache namespace '{namespace}': {str(e)}")
+
+
+async def get_cached(key: str) -> Optional[bytes]:
+    """Read a raw value from the cache backend, treating failures as misses"""
+    try:
+        return await FastAPICache.get_backend().get(f"{CACHE_PREFIX}:{key}")
+    except Exception as e:
+        logger.warning(f"Failed to read cache key '{key}': {str(e)}")
+        return None
+
+
+async def set_cached(key: str, value: bytes, expire: int) -> None:
+    """Store a raw value in the cache backend for expire seconds"""
+    try:
+        await FastAPICache.get_backend().set(f"{CACHE_PREFIX}:{key}", value, expire=expire)
+    except Exception as e:
+        logger.warning(f"Failed to write cache key '{key}': {str(e)}")
+
+
+async def publish(channel: str, message: str = "") -> None:
+    """Broadcast a message to every worker subscribed to a channel"""
+    try:
+        await _redis.publish(channel, message)
+    except Exception as e:
+        logger.warning(f"Failed to publish to channel '{channel}': {str(e)}")
+
+
+async def subscribe(channel: str, callback: Callable[[], Union[None, Awaitable[None]]]) -> None:
+    """
+    Call callback for every message published to a channel.
+
+    Runs until cancelled, resubscribing after connection errors. Meant to be
+    started as a background task at startup. Coroutine callbacks are awaited.
+    """
+    while True:
+        try:
+            async with _redis.pubsub() as pubsub:
+                await pubsub.subscribe(channel)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        result = callback()
+                        if inspect.isawaitable(result):
+                            await result
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Lost subscription to channel '{channel}': {str(e)}")
+            await asyncio.sleep(_RESUBSCRIBE_DELAY_SECONDS)
@@ -1,9 +1,13 @@
 # app/core/config.py
 from functools import lru_cache
-from pydantic_settings import BaseSettings
+from typing import Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore", frozen=True)
+
     # Application settings
     APP_ENV: str = "development"
     LOG_LEVEL: str = "DEBUG"
@@ -13,20 +17,37 @@ class Settings(BaseSettings):
     DB_USER: str = "postgres"
     DB_PASSWORD: str = "postgres"
     DB_HOST: str = "db"
-    DB_PORT: str = "5432"
+    DB_PORT: int = 5432
     DB_NAME: str = "promptdb"
+    # Hand out the most recently used pooled connection first
+    DB_POOL_USE_LIFO: bool = True
+    # Optional streaming replica for read-mostly lookups (same credentials)
+    DB_REPLICA_HOST: Optional[str] = None
+
+    # Cache settings
+    REDIS_URL: str = "redis://redis:6379/0"
+    # Seconds an LLM output is reused for identical runs (same prompt version,
+    # inputs, model and sampling settings); 0 disables it, since sampled
+    # outputs are expected to vary between calls
+    RUN_CACHE_TTL_SECONDS: int = 0
+    # LLM calls in flight at once for one POST /runs/bulk request
+    BULK_RUN_CONCURRENCY: int = 10
+
+    # Rows per multi-row INSERT in bulk_insert (capped by Postgres' bind parameter limit)
+    BULK_INSERT_CHUNK_SIZE: int = 500
+
+    # Rows fetched per round trip when streaming large result sets
+    DB_FETCH_SIZE: int = 100
 
     # Security settings
     FERNET_KEY: str
 
-    class Config:
-        env_file = ".env"
-
 
-@lru_cache()
-def get_settings():
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load settings once; every caller shares the same frozen instance"""
     return Settings()
 
 
 # Export settings instance
-settings = get_settings()
\ No newline at end of file
+settings = get_settings()
@@ -0,0 +1,43 @@
+# app/core/etag.py
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Any
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a weak ETag from the values that identify a resource's current state"""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+
+def http_date(value: datetime) -> str:
+    """Format a timestamp as an HTTP date, treating naive datetimes as UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def set_cache_headers(response: Response, etag: str, last_modified: datetime) -> None:
+    """Attach validators so clients can revalidate with If-None-Match"""
+    response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = http_date(last_modified)
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def not_modified(etag: str, last_modified: datetime) -> Response:
+    """Build a 304 response carrying the current validators"""
+    response = Response(status_code=304)
+    set_cache_headers(response, etag, last_modified)
+    return response
@@ -1,6 +1,6 @@
 # app/core/exceptions.py
 from fastapi import HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from loguru import logger
 
 
@@ -23,7 +23,7 @@ async def app_exception_handler(request: Request, exc: AppException):
         request_method=request.method
     ).error(f"AppException: {exc.detail}")
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": {
@@ -2,9 +2,7 @@
 import sys
 from pathlib import Path
 from loguru import logger
-from .config import get_settings
-
-settings = get_settings()
+from .config import settings
 
 
 class LoggerManager:
@@ -23,7 +21,9 @@ class LoggerManager:
             level=settings.LOG_LEVEL,
             format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message} | {extra}",
             rotation="500 MB",
-            retention="10 days"
+            retention="10 days",
+            enqueue=True,  # Write from a background thread so disk I/O never blocks requests
+            buffering=8192  # Batch records into fewer write() calls on that thread
         )
 
         # Add console logger for development
@@ -31,7 +31,8 @@ class LoggerManager:
             logger.add(
                 sys.stdout,
                 level=settings.LOG_LEVEL,
-                format="<green>{time:HH:mm:ss}</green> | <level>{level}</level> | <cyan>{message}</cyan>"
+                format="<green>{time:HH:mm:ss}</green> | <level>{level}</level> | <cyan>{message}</cyan>",
+                enqueue=True
             )
 
 
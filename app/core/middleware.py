@@ -0,0 +1,59 @@
+# app/core/middleware.py
+import time
+
+from loguru import logger
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class RequestLoggingMiddleware:
+    """
+    Log the completion or failure of each HTTP request.
+
+    Implemented as plain ASGI middleware rather than with @app.middleware("http"),
+    which runs every request through BaseHTTPMiddleware and its extra task
+    and memory streams.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter_ns()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                process_time_ns = time.perf_counter_ns() - start_time
+                logger.info(
+                    "Request completed",
+                    extra={
+                        "path": scope["path"],
+                        "method": scope["method"],
+                        "query_params": scope["query_string"].decode("latin-1"),
+                        "status_code": message["status"],
+                        "process_time_ms": round(process_time_ns / 1_000_000, 2)
+                    }
+                )
+                # Lazy, so the headers are only copied when DEBUG is enabled
+                logger.opt(lazy=True).debug(
+                    "Request headers",
+                    extra=lambda: {"path": scope["path"], "headers": dict(Headers(scope=scope))}
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            logger.error(
+                "Request failed",
+                extra={
+                    "path": scope["path"],
+                    "method": scope["method"],
+                    "error": str(e)
+                }
+            )
+            raise
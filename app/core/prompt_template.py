@@ -1,6 +1,13 @@
-from typing import Dict, Any
+from functools import lru_cache
+from string import Formatter
+from typing import Dict, Any, List, Optional, Tuple
 import re
 
+# Matches {variable} placeholders
+_VAR_RE = re.compile(r'\{([^}]+)\}')
+
+_FORMATTER = Formatter()
+
 
 class CustomPromptTemplate:
     """Custom prompt template that uses single braces for variables"""
@@ -8,14 +15,49 @@ class CustomPromptTemplate:
     def __init__(self, template: str):
         self.template = template
         # Find all variables in {variable} format
-        self.variables = re.findall(r'\{([^}]+)\}', template)
+        self.variables = _VAR_RE.findall(template)
+        # Literal/variable segments for the fast format path, None if the
+        # template needs full str.format handling
+        self._segments = self._parse(template)
+
+    @staticmethod
+    def _parse(template: str) -> Optional[List[Tuple[str, Optional[str]]]]:
+        """Split template into (literal, variable) pairs if it only uses plain {name} fields"""
+        try:
+            parsed = list(_FORMATTER.parse(template))
+        except ValueError:
+            # Malformed template, let str.format report the error
+            return None
+
+        segments = []
+        for literal, field_name, format_spec, conversion in parsed:
+            if field_name is not None and (
+                    format_spec or conversion or not field_name.isidentifier()
+            ):
+                return None
+            segments.append((literal, field_name))
+        return segments
 
     def format(self, **kwargs) -> str:
         """Format the template with the given variables"""
         try:
-            return self.template.format(**kwargs)
+            if self._segments is None:
+                return self.template.format(**kwargs)
+
+            parts = []
+            for literal, field_name in self._segments:
+                parts.append(literal)
+                if field_name is not None:
+                    parts.append(format(kwargs[field_name]))
+            return "".join(parts)
         except KeyError as e:
             missing_var = str(e).strip("'")
             raise ValueError(f"Missing required variable: {missing_var}")
         except Exception as e:
             raise ValueError(f"Error formatting prompt: {str(e)}")
+
+
+@lru_cache(maxsize=1024)
+def get_prompt_template(template: str) -> CustomPromptTemplate:
+    """Get a parsed template, reusing instances for identical template strings"""
+    return CustomPromptTemplate(template)
@@ -1,8 +1,17 @@
-import os
 import base64
+import os
+from functools import cache
+from cryptography.exceptions import InvalidTag
 from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from app.core.config import settings
 
+# Marks values written as AES-GCM; anything else is a legacy Fernet token
+AESGCM_PREFIX = "v2:"
+_NONCE_SIZE = 12
+
 
 def pad_base64(key: str) -> str:
     """Add padding to base64 string if needed"""
@@ -12,6 +21,7 @@ def pad_base64(key: str) -> str:
     return key
 
 
+@cache
 def get_encryption_key() -> bytes:
     """
     Get or generate Fernet encryption key
@@ -38,14 +48,34 @@ def get_encryption_key() -> bytes:
         return key
 
 
-_fernet = None
-
+@cache
 def get_fernet() -> Fernet:
-    """Get Fernet instance using encryption key"""
-    global _fernet
-    if _fernet is None:
-        _fernet = Fernet(get_encryption_key())
-    return _fernet
+    """Get the process-wide Fernet instance using encryption key"""
+    return Fernet(get_encryption_key())
+
+
+@cache
+def get_aesgcm() -> AESGCM:
+    """
+    Get the process-wide AES-GCM cipher
+
+    Its 256-bit key is derived from FERNET_KEY with HKDF, so no new secret
+    has to be configured and the Fernet key material is not reused as is.
+    """
+    # The normalized key may still hold URL-safe characters from a generated key
+    key_material = base64.b64decode(get_encryption_key().replace(b"-", b"+").replace(b"_", b"/"))
+    key = HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=b"prompt-management settings aes-gcm"
+    ).derive(key_material)
+    return AESGCM(key)
+
+
+# Key normalization and cipher setup run once, at import
+_FERNET = get_fernet()
+_AESGCM = get_aesgcm()
 
 
 def encrypt_value(value: str) -> str:
@@ -53,7 +83,10 @@ def encrypt_value(value: str) -> str:
     if not value:
         return ""
     try:
-        return get_fernet().encrypt(value.encode()).decode()
+        # Single-pass AEAD; the random nonce is stored in front of the ciphertext
+        nonce = os.urandom(_NONCE_SIZE)
+        ciphertext = _AESGCM.encrypt(nonce, value.encode(), None)
+        return AESGCM_PREFIX + base64.b64encode(nonce + ciphertext).decode()
     except Exception as e:
         print(f"Encryption error: {str(e)}")
         raise
@@ -64,8 +97,12 @@ def decrypt_value(encrypted_value: str) -> str:
     if not encrypted_value:
         return ""
     try:
-        return get_fernet().decrypt(encrypted_value.encode()).decode()
-    except InvalidToken:
+        if encrypted_value.startswith(AESGCM_PREFIX):
+            payload = base64.b64decode(encrypted_value[len(AESGCM_PREFIX):])
+            return _AESGCM.decrypt(payload[:_NONCE_SIZE], payload[_NONCE_SIZE:], None).decode()
+        # Values written before the switch to AES-GCM
+        return _FERNET.decrypt(encrypted_value.encode()).decode()
+    except (InvalidToken, InvalidTag):
         print("Failed to decrypt: Invalid token. This could mean the encryption key has changed.")
         raise
     except Exception as e:
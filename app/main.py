@@ -1,24 +1,26 @@
 # app/main.py
+import asyncio
+import contextlib
+from typing import List
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.exceptions import RequestValidationError
-from contextlib import asynccontextmanager
+from fastapi.responses import ORJSONResponse
 from loguru import logger
-from starlette.responses import JSONResponse
 
 from .core.logging import logger_manager
-from .core.exceptions import AppException, app_exception_handler, NotFoundError
+from .core.exceptions import AppException, app_exception_handler, NotFoundError, ValidationError
 from .core.config import get_settings
-from .core.database import engine, Base, get_db
+from .core.cache import API_KEYS_CHANNEL, LLM_SYSTEMS_CHANNEL, init_cache, subscribe
+from .core.database import engine, create_missing_tables, warm_up_pool
+from .core.middleware import RequestLoggingMiddleware
 from .api.v1.api import api_router
 from .services.llama_service import LlamaService
-import time
-
-settings = get_settings()
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
+class Lifespan:
     """
     Lifespan context manager for FastAPI
     
@@ -26,70 +28,107 @@ async def lifespan(app: FastAPI):
     - Sets up logging
     - Creates database tables
     - Initializes LlamaService
+    - Listens for API key and LLM system changes made by any worker
     - Cleans up resources on shutdown
     """
-    # Startup
-    try:
+
+    def __init__(self, app: FastAPI):
+        self.app = app
+        self._listeners: List[asyncio.Task] = []
+
+    async def __aenter__(self) -> None:
+        try:
+            await self._startup()
+        except Exception as e:
+            logger.error(f"Error during startup: {str(e)}")
+            # __aexit__ is not called when __aenter__ fails
+            await self._shutdown()
+            raise
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self._shutdown()
+
+    async def _startup(self) -> None:
         # Setup logging
         logger.info("Setting up logging...")
         logger_manager.setup_logging()
         logger.info("Logging setup complete")
+        settings = get_settings()
         logger.info(f"Application environment: {settings.APP_ENV}")
         logger.info(f"Log level: {settings.LOG_LEVEL}")
         
+        # Initialize response cache
+        init_cache()
+        logger.info("Response cache initialized")
+
+        # Settings writes in any worker clear the API keys cached in this one,
+        # and LLM system writes reload its systems
+        self._listeners = [
+            asyncio.create_task(subscribe(API_KEYS_CHANNEL, LlamaService.clear_api_keys)),
+            asyncio.create_task(subscribe(LLM_SYSTEMS_CHANNEL, LlamaService().reload_systems)),
+        ]
+        
         # Create database tables
-        logger.info("Creating database tables...")
-        Base.metadata.create_all(bind=engine)
-        logger.info("Database tables created successfully")
+        logger.info("Checking database tables...")
+        await create_missing_tables()
+        logger.info("Database tables ready")
+        
+        # Pre-create pooled connections
+        await warm_up_pool()
         
-        # Initialize services
-        db = next(get_db())
+        # LlamaService opens its own sessions, returning each connection to
+        # the pool as soon as it is done with it
         logger.info("Initializing LlamaService...")
-        llama_service = LlamaService(db)
-        llama_service.initialize()
+        await LlamaService().initialize()
         logger.info("LlamaService initialized successfully")
-        
-        yield
-        
-    except Exception as e:
-        logger.error(f"Error during startup: {str(e)}")
-        raise
-        
-    finally:
-        # Shutdown
+
+    async def _shutdown(self) -> None:
         logger.info("Shutting down application...")
-        # Add any cleanup code here if needed
+        for listener in self._listeners:
+            listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await listener
+        await engine.dispose()
 
 
 app = FastAPI(
     title="Prompt Management API",
     description="API for managing prompts and their versions",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=Lifespan,
+    default_response_class=ORJSONResponse
 )
 
+# Middleware added last runs first: CORS answers preflight requests
+# before they reach logging or compression
+
+# Compress larger JSON bodies (prompt content, run outputs)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# Request logging middleware
+app.add_middleware(RequestLoggingMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type", "If-None-Match"],
+    expose_headers=["ETag", "Last-Modified", "X-Next-Cursor"],
 )
 
 # Exception handlers
 app.add_exception_handler(AppException, app_exception_handler)
 app.add_exception_handler(NotFoundError, app_exception_handler)
+app.add_exception_handler(ValidationError, app_exception_handler)
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    error_details = []
-    for error in exc.errors():
-        error_details.append({
-            'loc': error['loc'],
-            'msg': error['msg'],
-            'type': error['type']
-        })
+    error_details = [
+        {'loc': error['loc'], 'msg': error['msg'], 'type': error['type']}
+        for error in exc.errors()
+    ]
     
     logger.error(
         "Request validation failed",
@@ -100,7 +139,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         }
     )
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=422,
         content={
             "error": {
@@ -114,55 +153,15 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    
-    logger.info(
-        f"Request started",
-        extra={
-            "path": request.url.path,
-            "method": request.method,
-            "query_params": str(request.query_params),
-            "client_host": request.client.host if request.client else None,
-            "headers": dict(request.headers)
-        }
-    )
-    
-    try:
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        
-        logger.info(
-            f"Request completed",
-            extra={
-                "path": request.url.path,
-                "method": request.method,
-                "status_code": response.status_code,
-                "process_time_ms": round(process_time * 1000, 2)
-            }
-        )
-        return response
-    except Exception as e:
-        logger.error(
-            f"Request failed",
-            extra={
-                "path": request.url.path,
-                "method": request.method,
-                "error": str(e)
-            }
-        )
-        raise
-
-
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    logger.info("Health check endpoint called")
     return {"status": "healthy"}
 
 
-@app.get("/test-error")
-async def test_error():
-    """Test error handling"""
-    raise NotFoundError("This is a test error")
\ No newline at end of file
+# Error-handling smoke test, not exposed in production
+if get_settings().APP_ENV != "production":
+    @app.get("/test-error")
+    async def test_error():
+        """Test error handling"""
+        raise NotFoundError("This is a test error")
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -18,5 +19,10 @@ class LLMSystem(Base):
     api_key_setting = Column(String, nullable=False)  # e.g., "openai_api_key"
     default_model = Column(String, nullable=False)  # e.g., "gpt-4-turbo"
     default_multimodal = Column(String, nullable=True)  # e.g., "gpt-4-vision"
-    available_models = Column(String, nullable=False)  # JSON string of available models
+    available_models = Column(JSONB, nullable=False)  # List of available model names
     is_default = Column(Boolean, default=False)  # Whether this is the default LLM system
+
+    __table_args__ = (
+        # Supports available_models @> '["gpt-4"]' membership lookups
+        Index('ix_llm_systems_available_models', 'available_models', postgresql_using='gin'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ARRAY, Enum as SQLEnum, CheckConstraint
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ARRAY, Enum as SQLEnum, CheckConstraint, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -61,7 +61,8 @@ class Project(Base):
     )
 
     # Relationships
-    prompts = relationship("Prompt", back_populates="project", cascade="all, delete-orphan")
+    # Eager-loaded: prompts are part of the project response and async sessions cannot lazy load
+    prompts = relationship("Prompt", back_populates="project", cascade="all, delete-orphan", lazy="selectin")
     runs = relationship("Run", back_populates="project", cascade="all, delete-orphan")
 
     # Add constraints
@@ -74,6 +75,9 @@ class Project(Base):
             name='check_version_format'
         ),
         CheckConstraint('array_length(tags, 1) <= 5', name='max_tags_check'),
+        # Filters used by list_projects
+        Index('ix_projects_status', 'status'),
+        Index('ix_projects_tags', 'tags', postgresql_using='gin'),
     )
 
     def __repr__(self):
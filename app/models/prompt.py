@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import List
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, JSON, Enum as SQLEnum, UniqueConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, JSON, Enum as SQLEnum, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
@@ -35,7 +35,11 @@ class Prompt(Base):
     # Ensure unique prompt names within a project
     __table_args__ = (
         UniqueConstraint('name', 'project_id', name='uix_prompt_name_project'),
+        # Serves list_project_prompts with its optional status filter
+        Index('ix_prompts_project_id_status', 'project_id', 'status'),
     )
+    # Fetch created_at/updated_at with RETURNING on flush, so writes need no refresh
+    __mapper_args__ = {"eager_defaults": True}
 
 
 class PromptVersion(Base):
@@ -65,7 +69,9 @@ class PromptVersion(Base):
         return self.prompt.project_id if self.prompt else None
     
     # Relationships
-    prompt = relationship("Prompt", back_populates="versions")
+    # Joined eagerly: the prompt_* properties read it for every serialized
+    # version, and a lazy load per version is an N+1 (and fails under asyncio)
+    prompt = relationship("Prompt", back_populates="versions", lazy="joined")
 
     # Ensure versions start from 0 and are unique per prompt
     __table_args__ = (
@@ -1,8 +1,9 @@
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Enum as SQLEnum, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.core.database import Base
+from app.schemas.run import TokenUsage
 
 class Run(Base):
     """
@@ -14,7 +15,7 @@ class Run(Base):
     __tablename__ = "runs"
 
     id = Column(Integer, primary_key=True, index=True)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     # Foreign keys
     prompt_id = Column(Integer, ForeignKey("prompts.id", ondelete="CASCADE"), nullable=False)
@@ -40,10 +41,18 @@ class Run(Base):
     prompt = relationship("Prompt", back_populates="runs")
     project = relationship("Project", back_populates="runs")
 
+    __table_args__ = (
+        # Serves list_runs: filter by prompt, newest first
+        Index("ix_runs_prompt_id_created_at", prompt_id, created_at.desc()),
+        # Runs per project by date; also backs the projects.id ON DELETE CASCADE
+        Index("ix_runs_project_id_created_at", project_id, created_at.desc()),
+    )
+    # Fetch created_at with RETURNING on insert, so create_run needs no refresh
+    __mapper_args__ = {"eager_defaults": True}
+
     @property
     def token_usage(self):
         """Get token usage stats as a TokenUsage object"""
-        from app.schemas.run import TokenUsage
         return TokenUsage(
             prompt_tokens=self.prompt_tokens,
             completion_tokens=self.completion_tokens,
@@ -1,6 +1,6 @@
-from datetime import datetime
 from sqlalchemy import Column, Integer, String, DateTime, Text, Enum as SQLEnum
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from enum import Enum
 
 from app.core.database import Base
@@ -23,8 +23,8 @@ class Setting(Base):
     __tablename__ = "settings"
 
     id = Column(Integer, primary_key=True, index=True)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
     key = Column(String, unique=True, nullable=False, index=True)
     type = Column(SQLEnum(SettingType), nullable=False)
@@ -41,7 +41,7 @@ class Setting(Base):
     @property
     def value(self) -> str:
         """Get the setting value, masked for API keys"""
-        decrypted = decrypt_value(self.encrypted_value)
+        decrypted = self.get_decrypted_value()
         if self.type == SettingType.API_KEY:
             return self.mask_value(decrypted)
         return decrypted
@@ -50,7 +50,14 @@ class Setting(Base):
     def value(self, plain_value: str):
         """Encrypt and store the setting value"""
         self.encrypted_value = encrypt_value(plain_value)
+        self._decrypted = (self.encrypted_value, plain_value or "")
 
     def get_decrypted_value(self) -> str:
         """Internal method to get the actual decrypted value when needed"""
-        return decrypt_value(self.encrypted_value)
+        # Memoized per instance, keyed on the ciphertext so a refresh or
+        # direct assignment to encrypted_value invalidates it
+        cached = getattr(self, "_decrypted", None)
+        if cached is None or cached[0] != self.encrypted_value:
+            cached = (self.encrypted_value, decrypt_value(self.encrypted_value))
+            self._decrypted = cached
+        return cached[1]
@@ -0,0 +1,10 @@
+# app/schemas/common.py
+from typing import Annotated
+
+from pydantic import Field, StringConstraints
+
+# Constrained types shared across schema modules, so every field using
+# them reuses one definition instead of repeating Field(max_length=...)
+ShortDescriptionStr = Annotated[str, StringConstraints(max_length=200)]
+LongDescriptionStr = Annotated[str, StringConstraints(max_length=500)]
+ProjectIdInt = Annotated[int, Field(gt=0)]
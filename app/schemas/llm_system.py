@@ -10,7 +10,7 @@ class LLMSystemBase(BaseModel):
     api_key_setting: str = Field(description="Name of the setting that contains the API key")
     default_model: str = Field(description="Default model to use")
     default_multimodal: Optional[str] = Field(None, description="Default multimodal model to use")
-    available_models: str = Field(description="JSON string of available models")
+    available_models: List[str] = Field(description="List of available models")
     is_default: bool = Field(description="Whether this is the default LLM system")
 
 
@@ -1,12 +1,16 @@
 # app/schemas/project.py
-from pydantic import BaseModel, ConfigDict, Field, field_validator, validator
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints, field_validator, validator
 from datetime import datetime
-from typing import Optional, List
+from typing import Annotated, Any, Optional, List
 from enum import Enum
 from ..core.exceptions import ValidationError
 from loguru import logger
+from .common import LongDescriptionStr
 from .prompt import PromptBase
 
+# Semantic version string, shared by the create and update schemas
+SemVerStr = Annotated[str, StringConstraints(pattern=r"^\d+\.\d+\.\d+$")]
+
 
 class ProjectStatus(str, Enum):
     """
@@ -23,13 +27,15 @@ class ProjectStatus(str, Enum):
     def _missing_(cls, value):
         """Handle case-insensitive enum matching"""
         if isinstance(value, str):
-            # Try to match case-insensitively
-            for member in cls:
-                if member.value.lower() == value.lower():
-                    return member
+            return _PROJECT_STATUS_BY_LOWER.get(value.lower())
         return None
 
 
+# Lowercased value -> member, for _missing_ (a dict in the class body
+# would become an enum member)
+_PROJECT_STATUS_BY_LOWER = {member.value.lower(): member for member in ProjectStatus}
+
+
 class ProjectBase(BaseModel):
     model_config = ConfigDict()
 
@@ -49,9 +55,8 @@ class ProjectBase(BaseModel):
         max_length=50,
         description="Name of the project"
     )
-    description: Optional[str] = Field(
+    description: Optional[LongDescriptionStr] = Field(
         None,
-        max_length=500,
         description="Detailed description of the project"
     )
     status: ProjectStatus = Field(
@@ -63,9 +68,8 @@ class ProjectBase(BaseModel):
         max_length=5,  # Maximum 5 tags
         description="List of project tags for organization"
     )
-    version: str = Field(
+    version: SemVerStr = Field(
         default="1.0.0",
-        pattern=r"^\d+\.\d+\.\d+$",
         description="Project version in semantic versioning format"
     )
     is_public: bool = Field(
@@ -91,10 +95,10 @@ class ProjectUpdate(BaseModel):
     """Schema for updating an existing project
     All fields are optional"""
     name: Optional[str] = Field(None, min_length=3, max_length=50)
-    description: Optional[str] = Field(None, max_length=500)
+    description: Optional[LongDescriptionStr] = None
     status: Optional[ProjectStatus] = None
     tags: Optional[List[str]] = Field(None, max_length=5)
-    version: Optional[str] = Field(None, pattern=r"^\d+\.\d+\.\d+$")
+    version: Optional[SemVerStr] = None
     is_public: Optional[bool] = None
 
     @field_validator('tags')
@@ -146,4 +150,11 @@ class Project(ProjectBase):
     prompts: List[PromptBase] = Field(
         default_factory=list,
         description="List of prompts associated with the project"
-    )
\ No newline at end of file
+    )
+
+    @classmethod
+    def from_orm_trusted(cls, row: Any) -> 'Project':
+        """Build the schema and its prompts from database rows without running validation"""
+        data = {name: getattr(row, name) for name in cls.model_fields if name != 'prompts'}
+        data['prompts'] = [PromptBase.from_orm_trusted(prompt) for prompt in row.prompts]
+        return cls.model_construct(**data)
@@ -1,14 +1,69 @@
 from enum import Enum
-from typing import List, Dict, Optional, Any
+from functools import lru_cache
+from operator import attrgetter
+from typing import Annotated, FrozenSet, Iterator, List, Dict, Optional, Any
 from datetime import datetime
 
-from loguru import logger
-from pydantic import BaseModel, field_validator, model_validator, Field, ConfigDict
+from pydantic import (
+    BaseModel, field_validator, model_validator, Field, ConfigDict, PrivateAttr, StringConstraints, create_model
+)
+from pydantic.fields import FieldInfo
 
 from app.core.exceptions import ValidationError
+from app.schemas.common import LongDescriptionStr, ProjectIdInt, ShortDescriptionStr
 
+# C-level attribute fetch for mapping over variable lists
+_get_name = attrgetter('name')
 
-class PromptStatus(Enum):
+# Valid variable names: letter followed by letters, digits or underscores
+_VAR_NAME_PATTERN = r'^[a-zA-Z][a-zA-Z0-9_]*$'
+
+
+def _is_variable_name(name: str) -> bool:
+    """Check name against _VAR_NAME_PATTERN without running the regex engine"""
+    return name.isascii() and name.isidentifier() and name[0].isalpha()
+
+
+def _extract_variables(content: str) -> Iterator[str]:
+    """
+    Yield the stripped names of {variable} placeholders in content.
+
+    Matches the same placeholders as the regex {([^}]+)} but scans with
+    str.find, which is much faster than the regex engine on long templates.
+    """
+    start = 0
+    while True:
+        open_brace = content.find('{', start)
+        if open_brace < 0:
+            return
+        close_brace = content.find('}', open_brace + 1)
+        if close_brace < 0:
+            return
+        if close_brace == open_brace + 1:
+            # "{}" holds no variable; resume after the opening brace
+            start = open_brace + 1
+            continue
+        yield content[open_brace + 1:close_brace].strip()
+        start = close_brace + 1
+
+
+@lru_cache(maxsize=1024)
+def _content_variables(content: str) -> FrozenSet[str]:
+    """Get the placeholder names in content, cached since prompts are re-validated unchanged"""
+    return frozenset(_extract_variables(content))
+
+
+# Constrained string types, declared once so every model and subclass that
+# uses them shares one definition instead of repeating Field(pattern=...)
+VariableNameStr = Annotated[
+    str, StringConstraints(min_length=1, max_length=50, pattern=_VAR_NAME_PATTERN)
+]
+PromptNameStr = Annotated[
+    str, StringConstraints(min_length=3, max_length=100, pattern=r'^[a-zA-Z][a-zA-Z0-9_\-\.]*$')
+]
+
+
+class PromptStatus(str, Enum):
     """
     Status of a prompt in its lifecycle
 
@@ -36,14 +91,31 @@ class PromptStatus(Enum):
         DEPRECATED -> ARCHIVED
         ARCHIVED -> No transitions allowed
         """
-        transitions = {
-            PromptStatus.DRAFT: {PromptStatus.TESTING, PromptStatus.PUBLISHED},
-            PromptStatus.TESTING: {PromptStatus.DRAFT, PromptStatus.PUBLISHED},
-            PromptStatus.PUBLISHED: {PromptStatus.DEPRECATED},
-            PromptStatus.DEPRECATED: {PromptStatus.ARCHIVED},
-            PromptStatus.ARCHIVED: set()
-        }
-        return new_status in transitions.get(self, set())
+        # Bit test on precomputed per-member masks; avoids hashing the
+        # enum members (Enum.__hash__ is implemented in Python)
+        return bool(self._allowed_mask & new_status._bit)
+
+
+# Allowed status transitions, the source for the per-member bitmasks below
+# (a dict in the class body would become an enum member)
+_PROMPT_STATUS_TRANSITIONS = {
+    PromptStatus.DRAFT: frozenset({PromptStatus.TESTING, PromptStatus.PUBLISHED}),
+    PromptStatus.TESTING: frozenset({PromptStatus.DRAFT, PromptStatus.PUBLISHED}),
+    PromptStatus.PUBLISHED: frozenset({PromptStatus.DEPRECATED}),
+    PromptStatus.DEPRECATED: frozenset({PromptStatus.ARCHIVED}),
+    PromptStatus.ARCHIVED: frozenset()
+}
+
+
+def _init_status_transition_masks() -> None:
+    """Give each status a bit and a mask of the statuses it may move to"""
+    for bit_index, status in enumerate(PromptStatus):
+        status._bit = 1 << bit_index
+    for status, targets in _PROMPT_STATUS_TRANSITIONS.items():
+        status._allowed_mask = sum(target._bit for target in targets)
+
+
+_init_status_transition_masks()
 
 
 class VariableType(str, Enum):
@@ -64,15 +136,9 @@ class PromptVariable(BaseModel):
     """
     model_config = ConfigDict(from_attributes=True)
     
-    name: str = Field(
-        min_length=1,
-        max_length=50,
-        pattern=r'^[a-zA-Z][a-zA-Z0-9_]*$',
-        description="Name of the variable"
-    )
-    description: Optional[str] = Field(
+    name: VariableNameStr = Field(description="Name of the variable")
+    description: Optional[ShortDescriptionStr] = Field(
         None,
-        max_length=200,
         description="Description of what the variable represents"
     )
     required: bool = Field(
@@ -85,6 +151,23 @@ class PromptVariable(BaseModel):
     )
 
 
+
+@lru_cache(maxsize=1024)
+def _intern_variable(
+        name: str, description: Optional[str], required: bool, type: str
+) -> PromptVariable:
+    """
+    Get a shared PromptVariable for a stored variable definition.
+
+    Many prompts declare identical variables, so read paths reuse one
+    instance per definition instead of building a copy per row. Shared
+    instances must be treated as read-only.
+    """
+    return PromptVariable.model_validate(
+        {'name': name, 'description': description, 'required': required, 'type': type}
+    )
+
+
 class PromptBase(BaseModel):
     """
     Base Prompt Schema with common attributes and validations
@@ -102,15 +185,9 @@ class PromptBase(BaseModel):
     """
     model_config = ConfigDict(from_attributes=True)
     
-    name: str = Field(
-        min_length=3,
-        max_length=100,
-        pattern=r'^[a-zA-Z][a-zA-Z0-9_\-\.]*$',
-        description="Name of the prompt"
-    )
-    description: Optional[str] = Field(
+    name: PromptNameStr = Field(description="Name of the prompt")
+    description: Optional[LongDescriptionStr] = Field(
         None,
-        max_length=500,
         description="Description of what the prompt does"
     )
     content: str = Field(
@@ -118,7 +195,7 @@ class PromptBase(BaseModel):
         max_length=10000,
         description="The actual prompt template"
     )
-    project_id: int = Field(gt=0, description="ID of the project this prompt belongs to")
+    project_id: ProjectIdInt = Field(description="ID of the project this prompt belongs to")
     variables: List[PromptVariable] = Field(
         default_factory=list,
         description="""List of variables used in the prompt. 
@@ -145,157 +222,103 @@ class PromptBase(BaseModel):
         description="JSON schema for validating structured output"
     )
 
+    # Status before this change, set on existing prompts to check the transition
+    _old_status: Optional[PromptStatus] = PrivateAttr(default=None)
+
+    @classmethod
+    def from_orm_trusted(cls, row: Any) -> 'PromptBase':
+        """
+        Build the schema from a database row without running validation
+
+        Rows were validated on the way in, so read paths can skip the
+        field constraints and validate_prompt. Only use this for ORM
+        objects, never for client input. Variables are stored as plain
+        JSON, so they are validated into shared PromptVariable instances
+        to get proper enum values.
+        """
+        data = {name: getattr(row, name) for name in cls.model_fields}
+        data['variables'] = [
+            _intern_variable(
+                var['name'],
+                var.get('description'),
+                var.get('required', True),
+                var.get('type', VariableType.STRING.value)
+            )
+            for var in row.variables or []
+        ]
+        return cls.model_construct(**data)
+
     @field_validator('name')
     @classmethod
     def validate_name(cls, v: str) -> str:
         """Validate prompt name format"""
         if not v[0].isalpha():
-            logger.error(f"Invalid prompt name: {v} - Must start with letter")
             raise ValidationError("Prompt name must start with a letter")
         return v
 
     @model_validator(mode='after')
-    def validate_content_variables(self) -> 'PromptBase':
+    def validate_prompt(self) -> 'PromptBase':
         """
-        Validate prompt content and extract variables
+        Validate the prompt as a whole in a single pass
+
+        Checks, in order:
+        1. Content variables use valid names and are all defined in variables
+        2. Status transitions are allowed (existing prompts only)
+        3. Published prompts have a description, as do all their variables
+        4. An image variable must be the only variable (multi-modal prompts);
+           it can be combined with output_schema for structured output
 
-        Checks:
-        1. Variable syntax {var_name}
-        2. All variables are defined in variables list
-        3. No duplicate variables
-        4. Variable names follow naming convention
+        Failures raise ValidationError, which app_exception_handler logs with
+        its message, so nothing is logged here.
         """
-        import re
+        # Content without a brace has no placeholders to check
+        if '{' in self.content:
+            # Extract variables from content using single braces
+            found_vars = _content_variables(self.content)
+
+            # Validate variable names
+            for var in found_vars:
+                if not _is_variable_name(var):
+                    raise ValidationError(
+                        f"Invalid variable name: {var}. Must start with letter and contain only letters, numbers, and underscores"
+                    )
 
-        # Extract variables from content using single braces
-        var_pattern = r'\{([^}]+)\}'
-        found_vars = {var.strip() for var in re.findall(var_pattern, self.content)}
+            # Check if all content variables are defined in variables list
+            defined_vars = set(map(_get_name, self.variables))
+            undefined_vars = found_vars - defined_vars
 
-        # Validate variable names
-        for var in found_vars:
-            if not re.match(r'^[a-zA-Z][a-zA-Z0-9_]*$', var):
-                logger.error(f"Invalid variable name in content: {var}")
+            if undefined_vars:
                 raise ValidationError(
-                    f"Invalid variable name: {var}. Must start with letter and contain only letters, numbers, and underscores"
+                    f"Variables used but not defined: {undefined_vars}. "
+                    f"Make sure to define all variables used in the content using the format: {{var}} for each variable."
                 )
 
-        # Check if all content variables are defined in variables list
-        defined_vars = {var.name for var in self.variables}
-        undefined_vars = found_vars - defined_vars
-        
-        if undefined_vars:
-            logger.error(f"Undefined variables in content: {undefined_vars}")
+        # Validate status transitions (only set for existing prompts)
+        old_status = self._old_status
+        if old_status is not None and not old_status.can_transition_to(self.status):
             raise ValidationError(
-                f"Variables used but not defined: {undefined_vars}. "
-                f"Make sure to define all variables used in the content using the format: {{var}} for each variable."
+                f"Cannot transition from {old_status.value} to {self.status.value}"
             )
 
-        return self
-
-    @model_validator(mode='after')
-    def validate_status_transition(self) -> 'PromptBase':
-        """Validate status transitions"""
-        if hasattr(self, 'id'):  # Only check for existing prompts
-            old_status = getattr(self, '_old_status', None)
-            if old_status and not old_status.can_transition_to(self.status):
-                logger.error(
-                    f"Invalid status transition",
-                    extra={
-                        "from_status": old_status,
-                        "to_status": self.status
-                    }
-                )
-                raise ValidationError(
-                    f"Cannot transition from {old_status.value} to {self.status.value}"
-                )
-        return self
-
-    @model_validator(mode='after')
-    def validate_published_requirements(self) -> 'PromptBase':
-        """
-        Validate requirements for published status
-
-        Requirements:
-        1. Must have description
-        2. All variables must have descriptions
-        3. Must have at least one test case
-        """
-        if self.status == PromptStatus.PUBLISHED:
+        # Publishing requirements
+        if self.status is PromptStatus.PUBLISHED:
             if not self.description:
                 raise ValidationError("Published prompts must have a description")
-
             for var in self.variables:
                 if not var.description:
                     raise ValidationError(
                         f"All variables must have descriptions when publishing. Missing for: {var.name}"
                     )
-        return self
-
-    @model_validator(mode='after')
-    def validate_variable_types(self) -> 'PromptBase':
-        """
-        Validate prompt variable types and output schema combinations.
-        
-        Rules:
-        1. If using an image variable:
-           - Can only have one image variable
-           - Can have output_schema for structured output (multi-modal with structured output)
-           - Cannot have other variable types
-        2. If using string variables:
-           - Can have multiple string variables
-           - Can have output_schema for structured output
-        """
-        if not self.variables:
-            return self
-            
-        # Get unique variable types
-        var_types = {var.type for var in self.variables}
-        
-        # Check if we have an image variable
-        if VariableType.IMAGE in var_types:
-            # If we have an image variable, it must be the only variable
-            if len(self.variables) > 1:
-                raise ValidationError(
-                    "When using an image variable, it must be the only variable in the prompt. "
-                    "You cannot mix image and string variables."
-                )
-            
-            # If we have both image and output_schema, this is a multi-modal prompt with structured output
-            if self.output_schema:
-                logger.info(
-                    "Multi-modal prompt with structured output detected",
-                    extra={
-                        "variable_type": "image",
-                        "has_output_schema": True,
-                        "output_schema": self.output_schema
-                    }
-                )
-        
-        return self
-
-    @model_validator(mode='after')
-    def validate_multi_modal_requirements(self) -> 'PromptBase':
-        """
-        Validate requirements for multi-modal prompts.
 
-        Requirements:
-        1. Must have exactly one image variable
-        """
-        # Check if this is a multi-modal prompt
-        has_image = any(var.type == VariableType.IMAGE for var in self.variables)
-
-        if has_image:
-            if len(self.variables) > 1:
-                raise ValidationError(
-                    "Multi-modal prompts must have exactly one image variable"
-                )
-
-            logger.info(
-                "Validated multi-modal prompt",
-                extra={
-                    "has_image": True
-                }
-            )
+        # An image variable must be the only variable, so single-variable
+        # prompts need no type scan; stop at the first image found
+        if len(self.variables) > 1:
+            for var in self.variables:
+                if var.type is VariableType.IMAGE:
+                    raise ValidationError(
+                        "When using an image variable, it must be the only variable in the prompt. "
+                        "You cannot mix image and string variables."
+                    )
 
         return self
 
@@ -312,22 +335,41 @@ class Prompt(PromptBase):
     updated_at: Optional[datetime] = None
 
 
+class PromptSummary(BaseModel):
+    """Schema for prompt list views, without the template and JSON columns"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    status: PromptStatus
+    current_version: int
+
+
 class PromptCreate(PromptBase):
     """Schema for creating a new prompt"""
     id: Optional[int] = Field(None, description="ID of the prompt to version. If provided, creates a new version.")
 
 
-class PromptUpdate(PromptBase):
-    """Schema for updating an existing prompt"""
-    name: Optional[str] = None
-    description: Optional[str] = None
-    content: Optional[str] = None
-    project_id: Optional[int] = None
-    variables: Optional[List[PromptVariable]] = None
-    max_tokens: Optional[int] = None
-    temperature: Optional[float] = None
-    status: Optional[PromptStatus] = None
-    output_schema: Optional[Dict[str, Any]] = None
+def _validate_update_name(cls, v: Optional[str]) -> Optional[str]:
+    """Validate prompt name format when the update sets a name"""
+    if v is None:
+        return v
+    return PromptBase.validate_name(v)
+
+
+# Every PromptBase field made optional, keeping its constraints. Built on
+# BaseModel rather than PromptBase so partial updates skip validate_prompt,
+# which assumes name and content are present; PromptService.update checks
+# the merged prompt instead.
+PromptUpdate = create_model(
+    'PromptUpdate',
+    __doc__="Schema for updating an existing prompt",
+    __validators__={'validate_name': field_validator('name')(_validate_update_name)},
+    **{
+        name: (Optional[field.annotation], FieldInfo.merge_field_infos(field, default=None, default_factory=None))
+        for name, field in PromptBase.model_fields.items()
+    }
+)
 
 
 class PromptInProject(PromptBase):
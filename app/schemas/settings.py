@@ -1,8 +1,12 @@
-from typing import Optional
-from pydantic import BaseModel, Field, ConfigDict
+from typing import Annotated, Optional
+from pydantic import BaseModel, Field, ConfigDict, StringConstraints
 
 from app.models.settings import SettingType
 
+SettingKeyStr = Annotated[
+    str, StringConstraints(min_length=1, max_length=100, pattern=r'^[a-zA-Z][a-zA-Z0-9_\-\.]*$')
+]
+
 
 class SettingBase(BaseModel):
     """
@@ -16,12 +20,7 @@ class SettingBase(BaseModel):
     """
     model_config = ConfigDict(from_attributes=True)
 
-    key: str = Field(
-        min_length=1,
-        max_length=100,
-        pattern=r'^[a-zA-Z][a-zA-Z0-9_\-\.]*$',
-        description="Unique key for the setting"
-    )
+    key: SettingKeyStr = Field(description="Unique key for the setting")
     type: SettingType = Field(description="Type of setting")
     description: Optional[str] = Field(None, description="Optional description")
 
@@ -1,23 +1,53 @@
-from typing import Optional, Dict, List
-import json
-import os
-import tempfile
+from functools import lru_cache
+from typing import Any, Callable, Optional, Dict, List, Tuple
+import asyncio
 import base64
+import re
+import time
 
 import tiktoken
-from llama_index.core import Settings, SimpleDirectoryReader
-from llama_index.core.callbacks import TokenCountingHandler, CallbackManager
+from llama_index.core import Settings
 from llama_index.core.llms import LLM
-from llama_index.core.schema import ImageDocument, Document
+from llama_index.core.schema import ImageDocument
 from llama_index.llms.openai import OpenAI
 from llama_index.llms.anthropic import Anthropic
 from llama_index.multi_modal_llms.openai import OpenAIMultiModal
-from sqlalchemy.orm import Session
+from loguru import logger
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
+from app.core.database import AsyncSessionLocal
 from app.core.exceptions import AppException, ValidationError
+from app.models.llm_system import LLMSystem
 from app.services.llm_system_service import LLMSystemService
 from app.services.settings import SettingsService
 
+# How long a decrypted API key is reused before the setting is read again
+_API_KEY_TTL_SECONDS = 300
+
+# Model names served by Anthropic, which share a single tokenizer
+_ANTHROPIC_MODEL_RE = re.compile(r"claude|anthropic", re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def _encoder_for(model: str) -> Callable[[str], List[int]]:
+    """Get the tiktoken encode function for a model, loading each vocabulary once"""
+    return tiktoken.encoding_for_model(model).encode
+
+
+@lru_cache(maxsize=1)
+def _anthropic_tokenizer():
+    """Get the Anthropic tokenizer without building a client per lookup"""
+    return Anthropic().tokenizer
+
+
+def _read_field(obj: Any, *names: str) -> Any:
+    """Read the first of names present on a provider response object or dict"""
+    for name in names:
+        value = obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+        if value is not None:
+            return value
+    return None
+
 
 class LlamaService:
     """Service for LlamaIndex operations"""
@@ -25,109 +55,169 @@ class LlamaService:
     _instance = None
     _is_initialized = False
     _settings = None
-    _llm_instances: Dict[str, LLM] = {}
-    _current_llm: Optional[LLM] = None
-    _tokenizers: Dict[str, TokenCountingHandler] = {}  # Store tokenizers for each model
+    _llm_instances: Dict[Tuple[str, str, bool], LLM] = {}
+    _init_lock = asyncio.Lock()
+    _llm_lock = asyncio.Lock()
+    _tokenizers: Dict[str, Callable[[str], List[int]]] = {}  # Store tokenizers for each model
+    _systems_by_name: Dict[str, LLMSystem] = {}  # LLM systems, loaded once by refresh_systems
+    _default_system: Optional[LLMSystem] = None
+    _api_keys: Dict[str, Tuple[float, Optional[str]]] = {}  # system name -> (expiry, decrypted key)
 
-    def __new__(cls, db: Session = None):
+    def __new__(cls, session_factory: async_sessionmaker = AsyncSessionLocal):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self, db: Session = None):
+    def __init__(self, session_factory: async_sessionmaker = AsyncSessionLocal):
         # Skip initialization if already done
         if LlamaService._is_initialized:
             return
-            
-        if db is None:
-            raise ValueError("db is required for first initialization")
-            
-        self.db = db
-        self.settings_service = SettingsService(db)
-        self.llm_system_service = LLMSystemService(db)
-        
-        # Initialize tokenizers for all models
-        self._initialize_tokenizers()
-        
-        LlamaService._is_initialized = True
 
-    def _initialize_tokenizers(self):
+        # The service outlives every request, so it opens its own short-lived
+        # sessions rather than holding on to one
+        self._session_factory = session_factory
+
+    async def refresh_systems(self) -> None:
+        """
+        Reload the LLM systems held by the service
+
+        The systems table holds a handful of rows that rarely change, so
+        they are read once instead of on every LLM request. Call this after
+        changing a system's configuration.
+        """
+        async with self._session_factory() as db:
+            systems = await LLMSystemService(db).list_all()
+        LlamaService._systems_by_name = {system.name: system for system in systems}
+        LlamaService._default_system = next((system for system in systems if system.is_default), None)
+
+    async def reload_systems(self) -> None:
+        """
+        Reload the LLM systems after they changed in this or another worker
+
+        Also registers tokenizers for any newly available models. Does
+        nothing before initialize, which loads the systems itself.
+        """
+        if not LlamaService._is_initialized:
+            return
+        await self.refresh_systems()
+        await self._initialize_tokenizers()
+
+    async def _initialize_tokenizers(self):
         """Initialize tokenizers for all available models"""
-        # Get all LLM systems
-        systems = self.llm_system_service.list_all()
-        
-        for system in systems:
+        for system in self._systems_by_name.values():
             if system.name.lower() == "openai":
                 # For OpenAI, create tokenizer for each available model
-                available_models = json.loads(system.available_models)
-                for model in available_models:
-                    self._tokenizers[model] = TokenCountingHandler(
-                        tokenizer=tiktoken.encoding_for_model(model).encode
-                    )
+                for model in system.available_models:
+                    self._tokenizers[model] = _encoder_for(model)
             elif system.name.lower() == "anthropic":
-                # For Anthropic, create a single tokenizer for all models
-                self._tokenizers["anthropic"] = TokenCountingHandler(
-                    tokenizer=Anthropic().tokenizer.encode
-                )
+                # For Anthropic, create a single tokenizer for all models,
+                # registered under each model so lookups are one dict get
+                tokenizer = _anthropic_tokenizer().encode
+                self._tokenizers["anthropic"] = tokenizer
+                for model in system.available_models:
+                    self._tokenizers[model] = tokenizer
 
-    def get_tokenizer(self, model: str) -> Optional[TokenCountingHandler]:
+    def get_tokenizer(self, model: str) -> Optional[Callable[[str], List[int]]]:
         """Get tokenizer for specified model"""
-        # For Anthropic models, return the common tokenizer
-        if any(name in model.lower() for name in ["claude", "anthropic"]):
+        tokenizer = self._tokenizers.get(model)
+        if tokenizer is None and _ANTHROPIC_MODEL_RE.search(model):
+            # Anthropic model missing from available_models: use the common tokenizer
             return self._tokenizers.get("anthropic")
-        
-        # For OpenAI models, return model-specific tokenizer
-        return self._tokenizers.get(model)
+        return tokenizer
 
     @classmethod
     def is_initialized(cls) -> bool:
         """Check if service is initialized"""
         return cls._is_initialized
 
-    def get_api_key(self, system_name: str) -> Optional[str]:
+    async def get_api_key(self, system_name: str) -> Optional[str]:
         """
         Get API key for a specific LLM system
         Returns None if key not configured
+
+        Keys are cached for a few minutes so is_ready, which runs before
+        every LLM call, needs no database query or decryption on a hit.
+        Settings writes clear the cache in this process and, over Redis
+        pub/sub, in every other worker; the TTL bounds staleness if a
+        notification is missed.
         """
+        cached = self._api_keys.get(system_name)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        system = self._systems_by_name.get(system_name)
+        if not system:
+            return None
+
+        # Load every system's key in one query, so a miss warms the others too
+        systems = self._systems_by_name
+        expiry = time.monotonic() + _API_KEY_TTL_SECONDS
         try:
-            system = self.llm_system_service.get_by_name(system_name)
-            if not system:
-                return None
-            return self.settings_service.get_decrypted_value(system.api_key_setting)
-        except Exception:
+            async with self._session_factory() as db:
+                keys = await SettingsService(db).get_decrypted_values(
+                    [s.api_key_setting for s in systems.values()]
+                )
+        except Exception as e:
+            # Not cached, so the next call retries instead of failing for the whole TTL
+            logger.error(f"Error loading API keys for {system_name}: {str(e)}")
             return None
 
-    def is_ready(self) -> bool:
+        for name, s in systems.items():
+            LlamaService._api_keys[name] = (expiry, keys.get(s.api_key_setting))
+        return keys.get(system.api_key_setting)
+
+    @classmethod
+    def clear_api_keys(cls) -> None:
+        """
+        Drop cached API keys so the next lookup reads the settings again
+
+        Cached LLM clients hold the key they were built with, so they are
+        dropped too and rebuilt with the new key on the next get_llm.
+        """
+        cls._api_keys = {}
+        cls._llm_instances = {}
+
+    async def is_ready(self) -> bool:
         """Check if service is ready to handle requests"""
         try:
-            default_system = self.llm_system_service.get_default()
+            default_system = self._default_system
             if not default_system:
                 return False
-            api_key = self.get_api_key(default_system.name)
+            api_key = await self.get_api_key(default_system.name)
             return api_key is not None
         except Exception:
             return False
 
-    def initialize(self) -> None:
+    async def initialize(self) -> None:
         """
-        Initialize LlamaIndex settings
+        Initialize tokenizers and LlamaIndex settings
         Does not require API key - will be initialized when needed
         """
-        if self._settings:
+        if LlamaService._is_initialized:
             return
 
-        # Initialize with base settings
-        self._settings = Settings
+        async with LlamaService._init_lock:
+            # Another caller may have finished initializing while we waited
+            if LlamaService._is_initialized:
+                return
+
+            # Load LLM systems and initialize tokenizers for all their models
+            await self.refresh_systems()
+            await self._initialize_tokenizers()
+
+            # Initialize with base settings
+            self._settings = Settings
+            LlamaService._is_initialized = True
 
-    def ensure_llm_ready(self):
+    async def ensure_llm_ready(self):
         """
         Ensure LLM is ready to use
         Raises AppException if not ready
         """
-        if not self.is_ready():
+        if not await self.is_ready():
             raise AppException("LLM service not ready - API key not configured")
 
-    def process_image(self, base64_image: str) -> Document:
+    def process_image(self, base64_image: str) -> ImageDocument:
         """
         Process base64 image and create ImageDocument
         
@@ -141,45 +231,61 @@ class LlamaService:
             ValidationError: If image processing fails
         """
         try:
-            # Create temp directory under app root if it doesn't exist
-            app_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-            temp_dir = os.path.join(app_root, "temp")
-            os.makedirs(temp_dir, exist_ok=True)
-            
-            # Create unique filename
-            import uuid
-            temp_file = os.path.join(temp_dir, f"temp_image_{uuid.uuid4()}.jpg")
-            
-            # Remove data:image prefix if present
-            if "base64," in base64_image:
-                base64_image = base64_image.split("base64,")[1]
-            
-            # Decode and write image
-            with open(temp_file, "wb") as f:
-                f.write(base64.b64decode(base64_image))
-            
-            # Load image using SimpleDirectoryReader and add temp file path to metadata
-            image_document: Document = SimpleDirectoryReader(
-                input_files=[temp_file]
-            ).load_data()[0]
-            
-            # Store temp file path in document metadata for cleanup
-            if not image_document.metadata:
-                image_document.metadata = {}
-            image_document.metadata['temp_file'] = temp_file
-            
-            return image_document
-                
+            # Remove data:image prefix if present; a single find and slice
+            # instead of a containment check plus split over the whole payload
+            mimetype = None
+            prefix_end = base64_image.find("base64,")
+            if prefix_end >= 0:
+                # "data:image/png;base64," carries the mimetype; passing it on
+                # spares the LLM clients sniffing it from the decoded bytes
+                if base64_image.startswith("data:"):
+                    mimetype = base64_image[len("data:"):prefix_end].rstrip(";") or None
+                base64_image = base64_image[prefix_end + len("base64,"):]
+
+            # Decode only to reject malformed payloads; the document is built
+            # straight from the base64 string, with no temp file round trip
+            base64.b64decode(base64_image)
+            document = ImageDocument(image=base64_image)
+            # Set after construction: ImageDocument.__init__ drops image_mimetype
+            if mimetype:
+                document.image_mimetype = mimetype
+            return document
         except Exception as e:
-            # Clean up file if there's an error
-            if 'temp_file' in locals() and os.path.exists(temp_file):
-                os.remove(temp_file)
             raise ValidationError(f"Failed to process image: {str(e)}")
 
-    def get_llm(self, model: str = None, is_multimodal: bool = False) -> LLM:
+    @staticmethod
+    def _create_llm(system_name: str, model: str, api_key: str, is_multimodal: bool) -> LLM:
+        """Build an LLM client for a system and model"""
+        if system_name == "openai":
+            if is_multimodal:
+                return OpenAIMultiModal(
+                    model=model,
+                    api_key=api_key,
+                    max_retries=3,
+                    max_new_tokens=10000,
+                    timeout=600,
+                    image_detail='high'
+                )
+            return OpenAI(
+                model=model,
+                api_key=api_key
+            )
+        if system_name == "anthropic":
+            return Anthropic(
+                model=model,
+                api_key=api_key
+            )
+        raise AppException(status_code=500, detail=f"Unsupported LLM system: {system_name}")
+
+    async def get_llm(self, model: str = None, is_multimodal: bool = False) -> LLM:
         """
         Get LLM instance
         
+        Clients are cached for the life of the process, keyed by system,
+        model and whether they are multimodal. Clients are shared between
+        concurrent requests, so token usage is read per response with
+        get_token_counts rather than from a counter on the client.
+
         Args:
             model: Optional model name to use, if not specified uses default
             is_multimodal: Whether this is a multimodal request
@@ -190,118 +296,64 @@ class LlamaService:
         Raises:
             AppException: If not initialized or model invalid
         """
-        self.ensure_llm_ready()
-        
-        if model:
-            if model not in self._llm_instances:
-                # Get current system's API key
-                default_system = self.llm_system_service.get_default()
-                api_key = self.get_api_key(default_system.name)
-                
-                # Set up token counter for this model
-                tokenizer = self.get_tokenizer(model)
-                if tokenizer:
-                    Settings.callback_manager = CallbackManager([tokenizer])
-                
-                if default_system.name.lower() == "openai":
-                    if is_multimodal:
-                        self._llm_instances[model] = OpenAIMultiModal(
-                            model=model,
-                            api_key=api_key,
-                            max_retries=3,
-                            max_new_tokens=10000,
-                            timeout=600,
-                            image_detail='high'
-                        )
-                    else:
-                        self._llm_instances[model] = OpenAI(
-                            model=model,
-                            api_key=api_key
-                        )
-                elif default_system.name.lower() == "anthropic":
-                    self._llm_instances[model] = Anthropic(
-                        model=model,
-                        api_key=api_key
-                    )
-            return self._llm_instances[model]
-        
-        if not self._current_llm:
-            # Initialize default LLM
-            default_system = self.llm_system_service.get_default()
-            api_key = self.get_api_key(default_system.name)
-            model = default_system.default_model
-            
-            # Set up token counter for default model
-            tokenizer = self.get_tokenizer(model)
-            if tokenizer:
-                Settings.callback_manager = CallbackManager([tokenizer])
-            
-            if default_system.name.lower() == "openai":
-                if is_multimodal:
-                    self._current_llm = OpenAIMultiModal(
-                        model=model,
-                        api_key=api_key,
-                        max_retries=3,
-                        max_new_tokens=10000,
-                        timeout=600,
-                        image_detail='high'
-                    )
-                else:
-                    self._current_llm = OpenAI(
-                        model=model,
-                        api_key=api_key
+        await self.ensure_llm_ready()
+
+        default_system = self._default_system
+        system_name = default_system.name.lower()
+        model = model or default_system.default_model
+        key = (system_name, model, bool(is_multimodal))
+
+        llm = self._llm_instances.get(key)
+        if llm is None:
+            async with LlamaService._llm_lock:
+                # Another request may have built it while we waited
+                llm = self._llm_instances.get(key)
+                if llm is None:
+                    api_key = await self.get_api_key(default_system.name)
+                    llm = self._create_llm(
+                        system_name,
+                        model,
+                        api_key,
+                        is_multimodal
                     )
-            elif default_system.name.lower() == "anthropic":
-                self._current_llm = Anthropic(
-                    model=model,
-                    api_key=api_key
-                )
-        return self._current_llm
+                    self._llm_instances[key] = llm
+
+        return llm
 
-    def get_token_counts(self) -> Dict[str, int]:
+    def get_token_counts(self, response: Any, model: str, prompt: str, output: str) -> Dict[str, int]:
         """
-        Get current token counts from the active token counter
-        
+        Get token counts for a single LLM call
+
+        Uses the usage the provider reported on the response (OpenAI
+        prompt/completion tokens, Anthropic input/output tokens), and
+        falls back to counting prompt and output with the model's
+        tokenizer when the response carries no usage.
+
+        Args:
+            response: Response returned by the LLM call
+            model: Model that served the call
+            prompt: Prompt sent to the model
+            output: Text the model returned
+
         Returns:
             Dictionary containing embedding, prompt, completion and total token counts
         """
-        if not Settings.callback_manager or not Settings.callback_manager.handlers:
-            return {
-                "embedding_tokens": 0,
-                "prompt_tokens": 0,
-                "completion_tokens": 0,
-                "total_tokens": 0
-            }
-            
-        # Get the token counter from handlers
-        token_counter = next(
-            (handler for handler in Settings.callback_manager.handlers 
-             if isinstance(handler, TokenCountingHandler)),
-            None
-        )
-        
-        if not token_counter:
-            return {
-                "embedding_tokens": 0,
-                "prompt_tokens": 0,
-                "completion_tokens": 0,
-                "total_tokens": 0
-            }
-            
+        raw = getattr(response, "raw", None)
+        usage = _read_field(raw, "usage") if raw is not None else None
+        if usage is not None:
+            prompt_tokens = _read_field(usage, "prompt_tokens", "input_tokens") or 0
+            completion_tokens = _read_field(usage, "completion_tokens", "output_tokens") or 0
+        else:
+            tokenizer = self.get_tokenizer(model) if model else None
+            if tokenizer is None:
+                prompt_tokens = completion_tokens = 0
+            else:
+                prompt_tokens = len(tokenizer(prompt))
+                completion_tokens = len(tokenizer(output))
+
         return {
-            "embedding_tokens": token_counter.total_embedding_token_count,
-            "prompt_tokens": token_counter.prompt_llm_token_count,
-            "completion_tokens": token_counter.completion_llm_token_count,
-            "total_tokens": token_counter.total_llm_token_count
+            "embedding_tokens": 0,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
         }
-
-    def reset_token_counter(self):
-        """Reset the token counter to get fresh counts for next LLM call"""
-        if Settings.callback_manager and Settings.callback_manager.handlers:
-            token_counter = next(
-                (handler for handler in Settings.callback_manager.handlers 
-                 if isinstance(handler, TokenCountingHandler)),
-                None
-            )
-            if token_counter:
-                token_counter.reset_counts()
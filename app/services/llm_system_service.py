@@ -1,134 +1,142 @@
-import json
 from typing import Optional, List
-from sqlalchemy.orm import Session
+from sqlalchemy import cast, func, select, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from loguru import logger
 
+from app.core.cache import LLM_SYSTEMS_CHANNEL, LLM_SYSTEMS_NAMESPACE, invalidate, publish
 from app.models.llm_system import LLMSystem
+from app.models.prompt import Prompt
+from app.schemas.prompt import VariableType
 from app.schemas.llm_system import LLMSystemCreate, LLMSystemUpdate
 from app.core.exceptions import AppException, NotFoundError, ValidationError
 
 
 class LLMSystemService:
     """Service for managing LLM systems"""
+    __slots__ = ("db",)
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get(self, system_id: int) -> Optional[LLMSystem]:
+    async def get(self, system_id: int) -> Optional[LLMSystem]:
         """Get LLM system by ID"""
-        return self.db.query(LLMSystem).filter(LLMSystem.id == system_id).first()
+        return await self.db.get(LLMSystem, system_id)
 
-    def get_by_name(self, name: str) -> Optional[LLMSystem]:
+    async def get_by_name(self, name: str) -> Optional[LLMSystem]:
         """Get LLM system by name"""
-        return self.db.query(LLMSystem).filter(LLMSystem.name == name).first()
+        return await self.db.scalar(select(LLMSystem).where(LLMSystem.name == name).limit(1))
 
-    def get_default(self) -> Optional[LLMSystem]:
+    async def get_default(self) -> Optional[LLMSystem]:
         """Get the default LLM system"""
-        return self.db.query(LLMSystem).filter(LLMSystem.is_default == True).first()
+        return await self.db.scalar(select(LLMSystem).where(LLMSystem.is_default == True).limit(1))
 
-    def list_all(self) -> List[LLMSystem]:
+    async def list_all(self) -> List[LLMSystem]:
         """List all LLM systems"""
-        return self.db.query(LLMSystem).all()
+        result = await self.db.execute(select(LLMSystem))
+        return list(result.scalars().all())
 
-    def create(self, system: LLMSystemCreate) -> LLMSystem:
+    @staticmethod
+    async def _notify_changed() -> None:
+        """
+        Clear cached system listings and tell every worker to reload its systems
+
+        The publishing worker is subscribed too, so it reloads the same way.
+        """
+        await invalidate(LLM_SYSTEMS_NAMESPACE)
+        await publish(LLM_SYSTEMS_CHANNEL)
+
+    async def create(self, system: LLMSystemCreate) -> LLMSystem:
         """Create a new LLM system"""
         try:
-            # Validate models JSON
-            try:
-                json.loads(system.available_models)
-            except json.JSONDecodeError:
-                raise ValidationError("available_models must be a valid JSON string")
-
-            # If this is set as default, unset others
+            # If this is set as default, unset others in the same transaction
             if system.is_default:
-                self._unset_all_defaults()
+                await self.db.execute(
+                    update(LLMSystem)
+                    .where(LLMSystem.is_default == True)
+                    .values(is_default=False)
+                    .execution_options(synchronize_session=False)
+                )
 
             db_system = LLMSystem(**system.model_dump())
             self.db.add(db_system)
-            self.db.commit()
-            self.db.refresh(db_system)
+            await self.db.commit()
+            await self.db.refresh(db_system)
+            await self._notify_changed()
             return db_system
 
         except SQLAlchemyError as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Database error creating LLM system: {str(e)}")
             raise AppException("Error creating LLM system")
 
-    def update(self, system_id: int, update_data: LLMSystemUpdate) -> LLMSystem:
+    async def update(self, system_id: int, update_data: LLMSystemUpdate) -> LLMSystem:
         """Update an LLM system"""
         try:
-            system = self.get(system_id)
+            system = await self.get(system_id)
             if not system:
                 raise NotFoundError(f"LLM system {system_id} not found")
 
-            # If setting as default, unset others
+            # If setting as default, flip every row in one statement; committed
+            # together with the other changes below
             if update_data.is_default:
-                self._unset_all_defaults()
+                await self.db.execute(
+                    update(LLMSystem)
+                    .values(is_default=LLMSystem.id == system_id)
+                    .execution_options(synchronize_session=False)
+                )
 
             # Update fields
             if update_data.default_model is not None:
                 # Validate model exists in available models
-                available = json.loads(system.available_models)
-                if update_data.default_model not in available:
+                if update_data.default_model not in system.available_models:
                     raise ValidationError(f"Model {update_data.default_model} not in available models")
                 system.default_model = update_data.default_model
 
             if update_data.default_multimodal is not None:
                 # Validate multimodal model exists in available models
-                available = json.loads(system.available_models)
-                if update_data.default_multimodal not in available:
+                if update_data.default_multimodal not in system.available_models:
                     raise ValidationError(f"Model {update_data.default_multimodal} not in available models")
                 system.default_multimodal = update_data.default_multimodal
 
             if update_data.is_default is not None:
                 system.is_default = update_data.is_default
 
-            self.db.commit()
-            self.db.refresh(system)
+            await self.db.commit()
+            await self.db.refresh(system)
+            await self._notify_changed()
             return system
 
-        except (SQLAlchemyError, json.JSONDecodeError) as e:
-            self.db.rollback()
-            raise AppException(f"Error updating LLM system: {str(e)}")
-
-    def _unset_all_defaults(self):
-        """Helper to unset is_default on all systems"""
-        try:
-            self.db.query(LLMSystem).update({"is_default": False})
-            self.db.commit()
         except SQLAlchemyError as e:
-            self.db.rollback()
-            raise AppException(f"Error unsetting defaults: {str(e)}")
+            await self.db.rollback()
+            raise AppException(f"Error updating LLM system: {str(e)}")
 
-    def get_all_available_models(self) -> List[str]:
+    async def get_all_available_models(self) -> List[str]:
         """Get all available models from all LLM systems"""
-        systems = self.db.query(LLMSystem).all()
-        all_models = []
-        for system in systems:
-            models = json.loads(system.available_models)
-            all_models.extend(models)
-        return all_models
-
-    def get_model_for_prompt(self, prompt_id: int) -> str:
-        """Get appropriate model for a prompt based on its variables"""
-        from app.services.prompt import PromptService
-        from app.schemas.prompt import VariableType
+        # Unnest the JSONB arrays in Postgres instead of hydrating every system
+        result = await self.db.execute(
+            select(func.jsonb_array_elements_text(LLMSystem.available_models))
+        )
+        return list(result.scalars().all())
 
-        # Get prompt and check its variables
-        prompt_service = PromptService(self.db)
-        prompt = prompt_service.get(prompt_id)
-        if not prompt:
+    async def get_model_for_prompt(self, prompt_id: int) -> str:
+        """Get appropriate model for a prompt based on its variables"""
+        # Check for image variables in Postgres; selects one boolean instead
+        # of loading the prompt and scanning its variables in Python
+        has_image = await self.db.scalar(
+            select(
+                cast(Prompt.variables, JSONB).contains([{"type": VariableType.IMAGE.value}])
+            ).where(Prompt.id == prompt_id)
+        )
+        if has_image is None:
             raise NotFoundError(f"Prompt {prompt_id} not found")
 
         # Get default LLM system
-        system = self.get_default()
+        system = await self.get_default()
         if not system:
             raise ValidationError("No default LLM system configured")
 
-        # Check if any variables are images
-        has_image = any(var.get("type", "string") == VariableType.IMAGE.value for var in prompt.variables)
-
         # Return multimodal model if has images, otherwise default model
         if has_image:
             if not system.default_multimodal:
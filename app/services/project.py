@@ -1,10 +1,13 @@
-from typing import List, Optional, TypeVar, Type
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List, Optional, Tuple, TypeVar, Type
+from sqlalchemy import exists, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from loguru import logger
 from fastapi import status as http_status  # Rename to avoid collision
 
 from app.models.project import Project
+from app.models.prompt import Prompt
 from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectStatus
 from app.core.exceptions import NotFoundError, ValidationError, AppException
 
@@ -15,15 +18,16 @@ class ProjectService:
     Service class for handling project-related database operations.
 
     Attributes:
-        db (Session): SQLAlchemy database session
+        db (AsyncSession): SQLAlchemy async database session
         model (Type[ProjectModel]): Project model class reference
     """
+    __slots__ = ("db", "model")
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.model: Type[ProjectModel] = Project  # Define model class reference
 
-    def create_project(self, project: ProjectCreate) -> Project:
+    async def create_project(self, project: ProjectCreate) -> Project:
         """
         Create a new project in the database.
 
@@ -40,8 +44,8 @@ class ProjectService:
         try:
             db_project = Project(**project.model_dump())
             self.db.add(db_project)
-            self.db.commit()
-            self.db.refresh(db_project)
+            await self.db.commit()
+            await self.db.refresh(db_project)
             logger.info(
                 "Project created successfully",
                 extra={
@@ -56,21 +60,21 @@ class ProjectService:
                 "Project creation failed - integrity error",
                 extra={"error": str(e), "project_name": project.name}
             )
-            self.db.rollback()
+            await self.db.rollback()
             raise ValidationError("Project with this name already exists")
         except SQLAlchemyError as e:
             logger.error(
                 "Project creation failed - database error",
                 extra={"error": str(e), "project_name": project.name}
             )
-            self.db.rollback()
+            await self.db.rollback()
             raise AppException(
                 status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Database error occurred while creating project",
                 error_code="DB_ERROR"
             )
 
-    def get_project(self, project_id: int) -> ProjectModel:
+    async def get_project(self, project_id: int) -> ProjectModel:
         """
         Retrieve a project by its ID.
 
@@ -85,7 +89,7 @@ class ProjectService:
             AppException: For database errors
         """
         try:
-            project = self.db.get(self.model, project_id)
+            project = await self.db.get(self.model, project_id)
             if not project:
                 logger.warning(f"Project not found", extra={"project_id": project_id})
                 raise NotFoundError(f"Project with ID {project_id} not found")
@@ -111,7 +115,81 @@ class ProjectService:
                 error_code="DB_ERROR"
             )
 
-    def get_projects(
+    async def project_exists(self, project_id: int) -> bool:
+        """
+        Check whether a project exists without loading it.
+
+        Args:
+            project_id (int): Unique identifier of the project
+
+        Returns:
+            bool: True if the project exists
+
+        Raises:
+            AppException: For database errors
+        """
+        try:
+            stmt = select(exists().where(self.model.id == project_id))
+            return bool(await self.db.scalar(stmt))
+        except SQLAlchemyError as e:
+            logger.error(
+                "Project existence check failed",
+                extra={"error": str(e), "project_id": project_id}
+            )
+            raise AppException(
+                status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred while retrieving project",
+                error_code="DB_ERROR"
+            )
+
+    async def get_project_version(self, project_id: int) -> Tuple[datetime, int]:
+        """
+        Get the values that identify a project's current state without loading it.
+
+        Project responses embed their prompts, so the version covers prompt
+        changes as well as changes to the project row.
+
+        Args:
+            project_id (int): Unique identifier of the project
+
+        Returns:
+            Tuple[datetime, int]: Last modification time and number of prompts
+
+        Raises:
+            NotFoundError: If project doesn't exist
+            AppException: For database errors
+        """
+        try:
+            stmt = (
+                select(
+                    self.model.updated_at,
+                    func.count(Prompt.id),
+                    func.max(func.coalesce(Prompt.updated_at, Prompt.created_at))
+                )
+                .outerjoin(Prompt, Prompt.project_id == self.model.id)
+                .where(self.model.id == project_id)
+                .group_by(self.model.id)
+            )
+            row = (await self.db.execute(stmt)).first()
+        except SQLAlchemyError as e:
+            logger.error(
+                "Project version lookup failed",
+                extra={"error": str(e), "project_id": project_id}
+            )
+            raise AppException(
+                status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred while retrieving project",
+                error_code="DB_ERROR"
+            )
+
+        if row is None:
+            raise NotFoundError(f"Project with ID {project_id} not found")
+
+        updated_at, prompt_count, prompts_modified = row
+        last_modified = max(updated_at, prompts_modified) if prompts_modified else updated_at
+        return last_modified, prompt_count
+
+    async def get_projects(
             self,
             skip: int = 0,
             limit: int = 100,
@@ -135,18 +213,17 @@ class ProjectService:
             AppException: For database errors
         """
         try:
-            from sqlalchemy import and_  # Add this import at the top of file
-
-            query = self.db.query(self.model)
+            query = select(self.model)
 
             if status:
-                query = query.filter(and_(self.model.status == status))
+                query = query.where(self.model.status == status)
             if tag:
                 if not (2 <= len(tag) <= 20):
                     raise ValidationError("Tag length must be between 2 and 20 characters")
-                query = query.filter(and_(self.model.tags.contains([tag])))
+                query = query.where(self.model.tags.contains([tag]))
 
-            projects = query.offset(skip).limit(limit).all()
+            result = await self.db.execute(query.offset(skip).limit(limit))
+            projects = list(result.scalars().all())
             logger.info(
                 "Projects retrieved successfully",
                 extra={
@@ -169,7 +246,7 @@ class ProjectService:
                 error_code="DB_ERROR"
             )
 
-    def update_project(self, project_id: int, project_update: ProjectUpdate) -> Project:
+    async def update_project(self, project_id: int, project_update: ProjectUpdate) -> Project:
         """
         Update an existing project.
 
@@ -185,15 +262,25 @@ class ProjectService:
             ValidationError: For integrity violations
             AppException: For database errors
         """
-        try:
-            db_project = self.get_project(project_id)
+        update_data = project_update.model_dump(exclude_unset=True)
+        if not update_data:
+            # Nothing to write, so skip the commit and refresh
+            return await self.get_project(project_id)
 
-            update_data = project_update.model_dump(exclude_unset=True)
-            for field, value in update_data.items():
-                setattr(db_project, field, value)
-
-            self.db.commit()
-            self.db.refresh(db_project)
+        try:
+            # One UPDATE ... RETURNING instead of load, flush and refresh
+            result = await self.db.execute(
+                update(self.model)
+                .where(self.model.id == project_id)
+                .values(**update_data)
+                .returning(self.model)
+            )
+            db_project = result.scalar_one_or_none()
+            if db_project is None:
+                raise NotFoundError(f"Project with ID {project_id} not found")
+            # RETURNING does not run eager loaders, so load prompts for the response
+            await self.db.refresh(db_project, ["prompts"])
+            await self.db.commit()
 
             logger.info(
                 "Project updated successfully",
@@ -213,21 +300,21 @@ class ProjectService:
                     "update_data": update_data
                 }
             )
-            self.db.rollback()
+            await self.db.rollback()
             raise ValidationError("Invalid update data")
         except SQLAlchemyError as e:
             logger.error(
                 "Project update failed - database error",
                 extra={"error": str(e), "project_id": project_id}
             )
-            self.db.rollback()
+            await self.db.rollback()
             raise AppException(
                 status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Database error occurred while updating project",
                 error_code="DB_ERROR"
             )
 
-    def delete_project(self, project_id: int) -> None:
+    async def delete_project(self, project_id: int) -> None:
         """
         Delete a project from the database.
 
@@ -239,11 +326,11 @@ class ProjectService:
             AppException: For database errors
         """
         try:
-            db_project = self.get_project(project_id)
+            db_project = await self.get_project(project_id)
             project_name = db_project.name  # Store for logging
 
-            self.db.delete(db_project)
-            self.db.commit()
+            await self.db.delete(db_project)
+            await self.db.commit()
 
             logger.info(
                 "Project deleted successfully",
@@ -257,14 +344,14 @@ class ProjectService:
                 "Project deletion failed",
                 extra={"error": str(e), "project_id": project_id}
             )
-            self.db.rollback()
+            await self.db.rollback()
             raise AppException(
                 status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Database error occurred while deleting project",
                 error_code="DB_ERROR"
             )
 
-    def increment_prompt_count(self, project_id: int) -> Project:
+    async def increment_prompt_count(self, project_id: int) -> Project:
         """
         Increment the prompt count for a project by one.
 
@@ -279,11 +366,19 @@ class ProjectService:
             AppException: For database errors
         """
         try:
-            db_project = self.get_project(project_id)
-            db_project.increment_prompt_count()  # Using model method
-
-            self.db.commit()
-            self.db.refresh(db_project)
+            # Increment in SQL so concurrent requests cannot both write N + 1
+            result = await self.db.execute(
+                update(self.model)
+                .where(self.model.id == project_id)
+                .values(prompt_count=self.model.prompt_count + 1)
+                .returning(self.model)
+            )
+            db_project = result.scalar_one_or_none()
+            if db_project is None:
+                raise NotFoundError(f"Project with ID {project_id} not found")
+            # RETURNING does not run eager loaders, so load prompts for the response
+            await self.db.refresh(db_project, ["prompts"])
+            await self.db.commit()
 
             logger.info(
                 "Project prompt count incremented",
@@ -298,7 +393,7 @@ class ProjectService:
                 "Prompt count increment failed",
                 extra={"error": str(e), "project_id": project_id}
             )
-            self.db.rollback()
+            await self.db.rollback()
             raise AppException(
                 status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Database error occurred while updating prompt count",
@@ -1,8 +1,12 @@
+from datetime import datetime
 from typing import Optional, TypeVar, Sequence, List, Dict
-from sqlalchemy import select, exc as sql_exc, union_all, JSON, desc, func
-from sqlalchemy.orm import Session
+from sqlalchemy import RowMapping, insert, select, update, exc as sql_exc, union_all, desc, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, raiseload
 from sqlalchemy.exc import SQLAlchemyError
 from loguru import logger
+from pydantic import ValidationError as PydanticValidationError
 
 from app.models.prompt import Prompt, PromptVersion
 from app.schemas.prompt import PromptBase, PromptStatus, VariableType, PromptCreate
@@ -10,6 +14,11 @@ from app.core.exceptions import AppException, ValidationError, NotFoundError
 
 T = TypeVar('T', bound=Prompt)
 
+# Built once rather than per variable on every validation
+_VARIABLE_TYPE_VALUES = frozenset(e.value for e in VariableType)
+_IMAGE_TYPE_VALUE = VariableType.IMAGE.value
+_PUBLISHABLE_STATUSES = tuple(s for s in PromptStatus if s.can_transition_to(PromptStatus.PUBLISHED))
+
 
 class PromptService:
     """
@@ -20,41 +29,52 @@ class PromptService:
     for all operations.
 
     Attributes:
-        db (Session): SQLAlchemy database session for database operations
+        db (AsyncSession): SQLAlchemy async database session for database operations
     """
+    __slots__ = ("db",)
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         """
         Initialize the prompt service.
 
         Args:
-            db (Session): SQLAlchemy database session
+            db (AsyncSession): SQLAlchemy async database session
         """
         self.db = db
 
-    def validate_variables(self, variables: List[Dict]) -> None:
+    def validate_variables(self, variables: Optional[List[Dict]]) -> None:
         """Validate prompt variables"""
         if not variables:
             return
             
-        # Check if there's an image variable
-        has_image = any(var.get("type") == VariableType.IMAGE.value for var in variables)
-        
-        if has_image and len(variables) > 1:
-            raise ValidationError(
-                "Prompts with image variables can only have one variable of type 'image'"
-            )
-            
-        # Validate each variable
+        # Validate each variable, noting image variables in the same pass
+        has_image = False
         for var in variables:
             if not var.get("name"):
                 raise ValidationError("Variable name is required")
-            if not var.get("type"):
+            var_type = var.get("type")
+            if not var_type:
                 raise ValidationError("Variable type is required")
-            if var.get("type") not in [e.value for e in VariableType]:
-                raise ValidationError(f"Invalid variable type: {var.get('type')}")
+            if var_type not in _VARIABLE_TYPE_VALUES:
+                raise ValidationError(f"Invalid variable type: {var_type}")
+            if var_type == _IMAGE_TYPE_VALUE:
+                has_image = True
+
+        # An image variable must be the only one
+        if has_image and len(variables) > 1:
+            raise ValidationError(
+                "Prompts with image variables can only have one variable of type 'image'"
+            )
+
+    def validate_merged(self, prompt: Prompt, data: Dict) -> None:
+        """Validate a stored prompt with a partial update applied"""
+        merged = {name: data.get(name, getattr(prompt, name)) for name in PromptBase.model_fields}
+        try:
+            PromptBase.model_validate(merged)
+        except PydanticValidationError as e:
+            raise ValidationError(str(e))
 
-    def create(self, prompt: PromptCreate) -> Prompt:
+    async def create(self, prompt: PromptCreate) -> Prompt:
         """
         Create a new prompt or create a new version of an existing prompt.
         
@@ -69,35 +89,41 @@ class PromptService:
             
         Raises:
             NotFoundError: If versioning a non-existent prompt
-            ValidationError: If validation fails
+            ValidationError: If validation fails or the name is taken in the project
             AppException: For other database errors
         """
         try:
             # If id is provided, create a new version
             if prompt.id:
-                existing_prompt = self.get(prompt.id)
+                existing_prompt = await self.get(prompt.id)
                 if not existing_prompt:
                     raise NotFoundError(detail=f"Prompt {prompt.id} not found")
-                return self.create_version(prompt.id, prompt)
+                return await self.create_version(prompt.id, prompt)
             
             # Convert variables to JSON-serializable format
             variables = [var.model_dump() for var in prompt.variables] if prompt.variables else []
             
-            db_prompt = Prompt(
-                name=prompt.name,
-                description=prompt.description,
-                content=prompt.content,
-                project_id=prompt.project_id,
-                variables=variables,
-                output_schema=prompt.output_schema,  # Already a dict, no need to convert
-                max_tokens=prompt.max_tokens,
-                temperature=prompt.temperature,
-                status=prompt.status
+            # A duplicate name inserts nothing and returns no row, so the
+            # uniqueness check costs no extra round trip
+            db_prompt = await self.db.scalar(
+                pg_insert(Prompt)
+                .values(
+                    name=prompt.name,
+                    description=prompt.description,
+                    content=prompt.content,
+                    project_id=prompt.project_id,
+                    variables=variables,
+                    output_schema=prompt.output_schema,  # Already a dict, no need to convert
+                    max_tokens=prompt.max_tokens,
+                    temperature=prompt.temperature,
+                    status=prompt.status
+                )
+                .on_conflict_do_nothing(constraint='uix_prompt_name_project')
+                .returning(Prompt)
             )
-            
-            self.db.add(db_prompt)
-            self.db.commit()
-            self.db.refresh(db_prompt)
+            if db_prompt is None:
+                raise ValidationError(detail="Prompt with this name already exists in project")
+            await self.db.commit()
             
             logger.info(
                 "Created new prompt",
@@ -111,7 +137,7 @@ class PromptService:
             return db_prompt
             
         except SQLAlchemyError as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(
                 "Failed to create prompt",
                 extra={
@@ -126,7 +152,7 @@ class PromptService:
                 error_code="DB_ERROR"
             )
 
-    def get(self, prompt_id: int) -> Optional[Prompt]:
+    async def get(self, prompt_id: int) -> Optional[Prompt]:
         """
         Retrieve a prompt by its ID.
 
@@ -140,7 +166,7 @@ class PromptService:
             AppException: If database operation fails
         """
         try:
-            return self.db.query(Prompt).filter(Prompt.id == prompt_id).first()
+            return await self.db.get(Prompt, prompt_id)
         except SQLAlchemyError as e:
             logger.error(f"Error retrieving prompt {prompt_id}: {str(e)}")
             raise AppException(
@@ -149,12 +175,37 @@ class PromptService:
                 error_code="DB_ERROR"
             )
 
-    def get_by_project(self, project_id: int) -> Sequence[Prompt]:
+    async def get_last_modified(self, prompt_id: int) -> Optional[datetime]:
+        """
+        Get when a prompt was last modified without loading it.
+
+        Args:
+            prompt_id (int): ID of the prompt
+
+        Returns:
+            Optional[datetime]: Last modification time or None if not found
+
+        Raises:
+            AppException: If database operation fails
+        """
+        try:
+            stmt = select(func.coalesce(Prompt.updated_at, Prompt.created_at)).where(Prompt.id == prompt_id)
+            return await self.db.scalar(stmt)
+        except SQLAlchemyError as e:
+            logger.error(f"Error retrieving prompt {prompt_id}: {str(e)}")
+            raise AppException(
+                status_code=500,
+                detail="Failed to retrieve prompt",
+                error_code="DB_ERROR"
+            )
+
+    async def get_by_project(self, project_id: int, status: Optional[PromptStatus] = None) -> Sequence[Prompt]:
         """
         Retrieve all prompts belonging to a project.
 
         Args:
             project_id (int): ID of the project
+            status (Optional[PromptStatus]): Only return prompts with this status
 
         Returns:
             Sequence[Prompt]: List of prompts belonging to the project
@@ -164,7 +215,9 @@ class PromptService:
         """
         try:
             stmt = select(Prompt).where(Prompt.project_id == project_id)
-            result = self.db.scalars(stmt).all()
+            if status:
+                stmt = stmt.where(Prompt.status == status)
+            result = (await self.db.scalars(stmt)).all()
             logger.debug(f"Retrieved {len(result)} prompts for project {project_id}")
             return result
         except SQLAlchemyError as e:
@@ -175,7 +228,44 @@ class PromptService:
                 error_code="DB_ERROR"
             )
 
-    def get_by_name_and_project(self, name: str, project_id: int) -> Optional[Prompt]:
+    async def list_summary(
+            self, project_id: int, cursor: Optional[int] = None, limit: int = 100
+    ) -> Sequence[RowMapping]:
+        """
+        Retrieve one page of prompt summaries for a project, newest first.
+
+        Only the summary columns are selected, so the content and JSON
+        columns are never read. Pages are keyed on the prompt id rather
+        than an offset, which stays fast however deep the page is.
+
+        Args:
+            project_id (int): ID of the project
+            cursor (Optional[int]): Smallest prompt id of the previous page
+            limit (int): Maximum number of summaries to return
+
+        Returns:
+            Sequence[RowMapping]: Rows with id, name, status and current_version
+
+        Raises:
+            AppException: If database operation fails
+        """
+        try:
+            stmt = select(
+                Prompt.id, Prompt.name, Prompt.status, Prompt.current_version
+            ).where(Prompt.project_id == project_id)
+            if cursor is not None:
+                stmt = stmt.where(Prompt.id < cursor)
+            stmt = stmt.order_by(Prompt.id.desc()).limit(limit)
+            return (await self.db.execute(stmt)).mappings().all()
+        except SQLAlchemyError as e:
+            logger.error(f"Error retrieving prompt summaries for project {project_id}: {str(e)}")
+            raise AppException(
+                status_code=500,
+                detail="Failed to retrieve project prompts",
+                error_code="DB_ERROR"
+            )
+
+    async def get_by_name_and_project(self, name: str, project_id: int) -> Optional[Prompt]:
         """
         Retrieve a prompt by its name and project_id.
 
@@ -190,10 +280,11 @@ class PromptService:
             AppException: If database operation fails
         """
         try:
-            return self.db.query(Prompt).filter(
+            stmt = select(Prompt).where(
                 Prompt.name == name,
                 Prompt.project_id == project_id
-            ).first()
+            )
+            return (await self.db.scalars(stmt)).first()
         except SQLAlchemyError as e:
             logger.error(f"Error retrieving prompt by name {name} and project {project_id}: {str(e)}")
             raise AppException(
@@ -202,7 +293,7 @@ class PromptService:
                 error_code="DB_ERROR"
             )
 
-    def update(self, prompt_id: int, prompt_data: PromptBase) -> Prompt:
+    async def update(self, prompt_id: int, prompt_data: PromptBase) -> Prompt:
         """
         Update an existing prompt.
 
@@ -218,41 +309,47 @@ class PromptService:
             ValidationError: If update data is invalid
             AppException: If database operation fails
         """
-        prompt = self.get(prompt_id)
+        prompt = await self.get(prompt_id)
         if not prompt:
             raise NotFoundError(detail=f"Prompt {prompt_id} not found")
 
         try:
             # Validate status transition if status is being updated
-            if 'status' in prompt_data.model_dump() and prompt_data.status != prompt.status:
+            if prompt_data.status is not None and prompt_data.status != prompt.status:
                 if not prompt.status.can_transition_to(prompt_data.status):
                     raise ValidationError(
                         detail=f"Invalid status transition from {prompt.status} to {prompt_data.status}"
                     )
 
+            # Dump once: each model_dump() deep-copies every field
+            data = prompt_data.model_dump(exclude_unset=True)
+
             # Validate variables
-            self.validate_variables(prompt_data.model_dump().get("variables", []))
+            self.validate_variables(data.get("variables"))
+
+            # Placeholders and variables may arrive in separate updates, so
+            # check the prompt as it will be stored, not just the payload
+            self.validate_merged(prompt, data)
 
-            for key, value in prompt_data.model_dump(exclude_unset=True).items():
+            for key, value in data.items():
                 setattr(prompt, key, value)
-            self.db.commit()
-            self.db.refresh(prompt)
+            await self.db.commit()
             logger.info(f"Updated prompt {prompt_id}")
             return prompt
         except sql_exc.IntegrityError as e:
             logger.error(f"Integrity error updating prompt {prompt_id}: {str(e)}")
-            self.db.rollback()
+            await self.db.rollback()
             raise ValidationError(detail="Prompt with this name already exists in project")
         except SQLAlchemyError as e:
             logger.error(f"Error updating prompt {prompt_id}: {str(e)}")
-            self.db.rollback()
+            await self.db.rollback()
             raise AppException(
                 status_code=500,
                 detail="Failed to update prompt",
                 error_code="DB_ERROR"
             )
 
-    def delete(self, prompt_id: int) -> None:
+    async def delete(self, prompt_id: int) -> None:
         """
         Delete a prompt and all its versions.
 
@@ -263,24 +360,24 @@ class PromptService:
             NotFoundError: If prompt doesn't exist
             AppException: If database operation fails
         """
-        prompt = self.get(prompt_id)
+        prompt = await self.get(prompt_id)
         if not prompt:
             raise NotFoundError(detail=f"Prompt {prompt_id} not found")
 
         try:
-            self.db.delete(prompt)
-            self.db.commit()
+            await self.db.delete(prompt)
+            await self.db.commit()
             logger.info(f"Deleted prompt {prompt_id} and its versions")
         except SQLAlchemyError as e:
             logger.error(f"Error deleting prompt {prompt_id}: {str(e)}")
-            self.db.rollback()
+            await self.db.rollback()
             raise AppException(
                 status_code=500,
                 detail="Failed to delete prompt",
                 error_code="DB_ERROR"
             )
 
-    def create_version(self, prompt_id: int, prompt_data: Optional[PromptBase] = None) -> Prompt:
+    async def create_version(self, prompt_id: int, prompt_data: Optional[PromptBase] = None) -> Prompt:
         """
         Create a new version of a prompt.
 
@@ -298,46 +395,58 @@ class PromptService:
         """
         try:
             # Get current prompt
-            prompt = self.get(prompt_id)
+            prompt = await self.get(prompt_id)
             if not prompt:
                 raise NotFoundError(f"Prompt {prompt_id} not found")
             
-            # First, store current version in prompt_versions
-            version_record = PromptVersion(
-                prompt_id=prompt.id,
-                version=prompt.current_version,  # Store current version number
-                description=prompt.description,  # Include description
-                content=prompt.content,
-                variables=prompt.variables,
-                output_schema=prompt.output_schema,
-                max_tokens=prompt.max_tokens,
-                temperature=prompt.temperature
+            old_version = prompt.current_version
+
+            # Dump once, for both the validation and the update below
+            data = (
+                prompt_data.model_dump(exclude={'id', 'current_version', 'version_count'})
+                if prompt_data else None
             )
-            self.db.add(version_record)
-            
-            # Increment version numbers
-            prompt.version_count += 1
-            prompt.current_version = prompt.version_count
-            
-            # Now update prompt with new data
-            if prompt_data:
-                # Convert entire prompt_data to dict to ensure proper JSON serialization
-                data = prompt_data.model_dump(exclude={'id', 'current_version', 'version_count'})
-                for key, value in data.items():
-                    if value is not None:
-                        setattr(prompt, key, value)
-            
+
             # Validate variables
-            self.validate_variables(prompt_data.model_dump().get("variables", []) if prompt_data else prompt.variables)
-            
-            self.db.commit()
-            self.db.refresh(prompt)
-            
+            self.validate_variables(data.get("variables") if data else prompt.variables)
+
+            # First, store current version in prompt_versions, copied row to
+            # row inside Postgres
+            await self.db.execute(
+                insert(PromptVersion).from_select(
+                    ["prompt_id", "version", "description", "content", "variables",
+                     "output_schema", "max_tokens", "temperature"],
+                    select(
+                        Prompt.id, Prompt.current_version, Prompt.description, Prompt.content,
+                        Prompt.variables, Prompt.output_schema, Prompt.max_tokens, Prompt.temperature
+                    ).where(Prompt.id == prompt_id)
+                )
+            )
+
+            # Then increment version numbers and apply the new data in one
+            # UPDATE; counting in SQL keeps concurrent versioning consistent
+            values = {}
+            if data:
+                values = {key: value for key, value in data.items() if value is not None}
+            result = await self.db.execute(
+                update(Prompt)
+                .where(Prompt.id == prompt_id)
+                .values(
+                    version_count=Prompt.version_count + 1,
+                    current_version=Prompt.version_count + 1,
+                    **values
+                )
+                .returning(Prompt)
+                .execution_options(populate_existing=True)
+            )
+            prompt = result.scalar_one()
+            await self.db.commit()
+
             logger.info(
                 "Created new prompt version",
                 extra={
                     "prompt_id": prompt.id,
-                    "old_version": version_record.version,
+                    "old_version": old_version,
                     "new_version": prompt.current_version,
                     "description": prompt.description
                 }
@@ -346,7 +455,7 @@ class PromptService:
             return prompt
             
         except SQLAlchemyError as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error creating version for prompt {prompt_id}: {str(e)}")
             raise AppException(
                 status_code=500,
@@ -354,7 +463,7 @@ class PromptService:
                 error_code="DB_ERROR"
             )
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error creating prompt version: {str(e)}")
             raise AppException(
                 status_code=500,
@@ -362,7 +471,7 @@ class PromptService:
                 error_code="UNKNOWN_ERROR"
             )
 
-    def publish(self, prompt_id: int) -> Prompt:
+    async def publish(self, prompt_id: int) -> Prompt:
         """
         Publish a prompt by changing its status to PUBLISHED.
         
@@ -380,31 +489,38 @@ class PromptService:
             ValidationError: If status transition is invalid
             AppException: If database operation fails
         """
-        prompt = self.get(prompt_id)
-        if not prompt:
-            raise NotFoundError(detail=f"Prompt {prompt_id} not found")
-
-        if not prompt.status.can_transition_to(PromptStatus.PUBLISHED):
-            raise ValidationError(
-                detail=f"Cannot transition from {prompt.status} to {PromptStatus.PUBLISHED}"
-            )
-
         try:
-            prompt.status = PromptStatus.PUBLISHED
-            self.db.commit()
-            self.db.refresh(prompt)
-            logger.info(f"Published prompt {prompt_id}")
-            return prompt
+            # Transition check and status change in one statement, so a
+            # concurrent status change cannot slip in between them
+            prompt = await self.db.scalar(
+                update(Prompt)
+                .where(Prompt.id == prompt_id, Prompt.status.in_(_PUBLISHABLE_STATUSES))
+                .values(status=PromptStatus.PUBLISHED)
+                .returning(Prompt)
+                .execution_options(populate_existing=True)
+            )
+            if prompt is not None:
+                await self.db.commit()
+                logger.info(f"Published prompt {prompt_id}")
+                return prompt
         except SQLAlchemyError as e:
             logger.error(f"Error publishing prompt {prompt_id}: {str(e)}")
-            self.db.rollback()
+            await self.db.rollback()
             raise AppException(
                 status_code=500,
                 detail="Failed to publish prompt",
                 error_code="DB_ERROR"
             )
 
-    def get_version(self, prompt_id: int, version: int) -> Optional[PromptVersion]:
+        # Nothing was updated: tell a missing prompt from a disallowed transition
+        prompt = await self.get(prompt_id)
+        if not prompt:
+            raise NotFoundError(detail=f"Prompt {prompt_id} not found")
+        raise ValidationError(
+            detail=f"Cannot transition from {prompt.status} to {PromptStatus.PUBLISHED}"
+        )
+
+    async def get_version(self, prompt_id: int, version: int) -> Optional[PromptVersion]:
         """
         Retrieve a specific version of a prompt.
 
@@ -419,10 +535,15 @@ class PromptService:
             AppException: If database operation fails
         """
         try:
-            return self.db.query(PromptVersion).filter(
-                PromptVersion.prompt_id == prompt_id,
-                PromptVersion.version == version
-            ).first()
+            stmt = (
+                select(PromptVersion)
+                .options(joinedload(PromptVersion.prompt))
+                .where(
+                    PromptVersion.prompt_id == prompt_id,
+                    PromptVersion.version == version
+                )
+            )
+            return (await self.db.scalars(stmt)).first()
         except SQLAlchemyError as e:
             logger.error(f"Error retrieving version {version} of prompt {prompt_id}: {str(e)}")
             raise AppException(
@@ -431,10 +552,13 @@ class PromptService:
                 error_code="DB_ERROR"
             )
 
-    def get_versions(self, prompt_id: int) -> Sequence[PromptVersion]:
+    async def get_versions(self, prompt_id: int) -> Sequence[PromptVersion]:
         try:
-            # Get the prompt first to get its details
-            prompt = self.get(prompt_id)
+            # Get the prompt first to get its details. The version properties
+            # only read its columns, so relationship loads are refused
+            prompt = await self.db.scalar(
+                select(Prompt).options(raiseload('*')).where(Prompt.id == prompt_id)
+            )
             if not prompt:
                 raise NotFoundError(detail=f"Prompt {prompt_id} not found")
 
@@ -444,8 +568,8 @@ class PromptService:
                 PromptVersion.version,
                 PromptVersion.description,
                 PromptVersion.content,
-                PromptVersion.variables.cast(JSON),
-                PromptVersion.output_schema.cast(JSON),
+                PromptVersion.variables,
+                PromptVersion.output_schema,
                 PromptVersion.max_tokens,
                 PromptVersion.temperature,
                 PromptVersion.created_at
@@ -457,8 +581,8 @@ class PromptService:
                 Prompt.current_version.label('version'),
                 Prompt.description,
                 Prompt.content,
-                Prompt.variables.cast(JSON),
-                Prompt.output_schema.cast(JSON),
+                Prompt.variables,
+                Prompt.output_schema,
                 Prompt.max_tokens,
                 Prompt.temperature,
                 func.coalesce(Prompt.updated_at, Prompt.created_at).label('created_at')
@@ -470,7 +594,7 @@ class PromptService:
                 desc("version")
             )
 
-            result = self.db.execute(final_query).all()
+            result = (await self.db.execute(final_query)).all()
             logger.debug(f"Retrieved {len(result)} versions for prompt {prompt_id}")
 
             # Convert result to PromptVersion objects
@@ -500,24 +624,24 @@ class PromptService:
                 detail="Failed to retrieve prompt versions",
                 error_code="DB_ERROR"
             )
-    def get_all(self, skip: int = 0, limit: int = 100) -> Sequence[Prompt]:
+    async def get_all(self, last_seen_id: Optional[int] = None, limit: int = 100) -> Sequence[Prompt]:
         """
-        Get all prompts (latest versions only).
+        Get all prompts (latest versions only), newest first.
 
         Args:
-            skip: Number of records to skip
+            last_seen_id: Smallest prompt id of the previous page; pages are
+                keyed on id instead of an offset that scans skipped rows
             limit: Maximum number of records to return
 
         Returns:
             List[Prompt]: List of prompts
         """
         try:
-            query = (
-                select(Prompt)
-                .offset(skip)
-                .limit(limit)
-            )
-            return self.db.scalars(query).all()
+            query = select(Prompt)
+            if last_seen_id is not None:
+                query = query.where(Prompt.id < last_seen_id)
+            query = query.order_by(Prompt.id.desc()).limit(limit)
+            return (await self.db.scalars(query)).all()
         except SQLAlchemyError as e:
             logger.error(f"Error retrieving prompts: {str(e)}")
             raise AppException(
@@ -1,37 +1,108 @@
+import asyncio
 from datetime import datetime, timezone
-import json
-import os
+import hashlib
 import time
-from typing import Dict, Optional, Sequence
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Type, Union
 
 from jsonschema_pydantic import jsonschema_to_pydantic
 from llama_index.core.output_parsers import PydanticOutputParser
 from llama_index.core.program import MultiModalLLMCompletionProgram
+from llama_index.core.schema import ImageDocument
 from loguru import logger
-from pydantic import ValidationError
-from sqlalchemy.orm import Session
+import orjson
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 from sqlalchemy.exc import SQLAlchemyError
 
+from app.core.cache import RUNS_NAMESPACE, get_cached, set_cached
+from app.core.config import settings
 from app.core.exceptions import AppException, NotFoundError
-from app.core.prompt_template import CustomPromptTemplate
+from app.core.prompt_template import get_prompt_template
+from app.models.prompt import Prompt, PromptVersion
 from app.models.run import Run
 from app.schemas.prompt import VariableType
+from app.schemas.run import RunCreate
 from app.services.llama_service import LlamaService
 from app.services.llm_system_service import LLMSystemService
 from app.services.prompt import PromptService
 
 
+# Token counts recorded for runs served from the cache
+_NO_TOKENS = {"embedding_tokens": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+
+
+class _PreparedRun(NamedTuple):
+    """A run with its prompt loaded and formatted, ready for the LLM call"""
+    prompt_id: int
+    project_id: int
+    input_variables: Dict
+    structured_output: bool
+    model: str
+    version: int
+    prompt_obj: Union[Prompt, PromptVersion]
+    formatted_prompt: str
+    has_image: bool
+    image_documents: List[ImageDocument]
+
+
+@lru_cache(maxsize=256)
+def _output_model_for(schema_json: str) -> Type[BaseModel]:
+    """Build the Pydantic model for an output schema once per distinct schema"""
+    return jsonschema_to_pydantic(orjson.loads(schema_json))
+
+
+@lru_cache(maxsize=256)
+def _schema_instructions(schema_json: str) -> str:
+    """Format the structured-output instructions once per distinct schema"""
+    return (
+        "\n\nProvide your response in valid JSON format following this schema:\n"
+        + orjson.dumps(orjson.loads(schema_json), option=orjson.OPT_INDENT_2).decode()
+    )
+
+
+def _run_cache_key(
+        prompt_id: int,
+        version: int,
+        input_variables: Dict,
+        formatted_prompt: str,
+        output_schema: Optional[Dict],
+        model: str,
+        structured_output: bool,
+        temperature: Optional[float],
+        max_tokens: Optional[int]
+) -> str:
+    """
+    Build the cache key for a run from everything that shapes its output
+
+    The version alone does not pin the template: prompts can be edited in
+    place without a new version, so the formatted prompt and output schema
+    are part of the key too.
+    """
+    payload = orjson.dumps(
+        [
+            prompt_id, version, input_variables, formatted_prompt, output_schema,
+            model, structured_output, temperature, max_tokens
+        ],
+        option=orjson.OPT_SORT_KEYS
+    )
+    return f"{RUNS_NAMESPACE}:{hashlib.blake2b(payload, digest_size=16).hexdigest()}"
+
+
 class RunService:
     """Service for managing runs"""
+    __slots__ = ("db", "prompt_service", "llm_system_service", "llama_service")
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         """Initialize service"""
         self.db = db
         self.prompt_service = PromptService(db)
         self.llm_system_service = LLMSystemService(db)
-        self.llama_service = LlamaService(db)
+        self.llama_service = LlamaService()
 
-    def create_run(
+    async def create_run(
         self,
         prompt_id: int,
         project_id: int,
@@ -42,186 +113,58 @@ class RunService:
     ) -> Run:
         """Create new run"""
         try:
-            # Get the prompt and its version
-            prompt_obj = self.prompt_service.get(prompt_id)
-            if not prompt_obj:
-                raise NotFoundError(f"Prompt {prompt_id} not found")
-
-            # Then handle versioning if specified
-            if version is not None:
-                if version != prompt_obj.current_version:
-                    prompt_version = self.prompt_service.get_version(prompt_id, version)
-                    if not prompt_version:
-                        raise NotFoundError(f"Version {version} of prompt {prompt_id} not found")
-                    prompt_obj = prompt_version
-
-            # Store the version we're using
-            used_version = version if version is not None else prompt_obj.current_version
-
-            # Validate structured output requirements
-            if structured_output:
-                if not prompt_obj.output_schema:
-                    raise ValidationError("Structured output requested but prompt has no output schema defined")
-
-            # Determine if we have any image variables and process them
-            has_image = False
-            image_documents = []
-            for var in prompt_obj.variables:
-                if var.get("type") == VariableType.IMAGE.value:
-                    has_image = True
-                    var_name = var.get("name")
-                    if var_name not in input_variables:
-                        raise ValidationError(f"Missing required image variable: {var_name}")
-                    
-                    image_doc = self.llama_service.process_image(input_variables[var_name])
-                    image_documents.append(image_doc)
-
-            # Get appropriate model based on variable types
-            if model is None:
-                if has_image:
-                    system = self.llm_system_service.get_default()
-                    if not system or not system.default_multimodal:
-                        raise ValidationError("No default multimodal model configured")
-                    model = system.default_multimodal
-                else:
-                    system = self.llm_system_service.get_default()
-                    if not system:
-                        raise ValidationError("No default LLM system configured")
-                    model = system.default_model
-
-            # Create LLM instance
-            llm = self.llama_service.get_llm(model, is_multimodal=has_image)
-            
-            # Format prompt with variables
-            prompt_template = CustomPromptTemplate(prompt_obj.content)
-            if not has_image:
-                formatted_prompt = prompt_template.format(**input_variables)
-            else:
-                formatted_prompt = prompt_obj.content
+            db_run = await self._execute_run(
+                prompt_id, project_id, input_variables, structured_output, model, version
+            )
+            self.db.add(db_run)
+            await self.db.commit()
+            return db_run
+        except NotFoundError:
+            raise
+        except ValidationError:
+            raise
+        except AppException:
+            raise
+        except Exception as e:
+            await self.db.rollback()
+            raise AppException(
+                status_code=500,
+                detail=f"Error creating run: {str(e)}",
+                error_code="RUN_CREATION_ERROR"
+            )
 
-            # Start timing before LLM operations
-            start_time = time.time()
+    async def create_runs_bulk(self, runs_in: Sequence[RunCreate]) -> List[Run]:
+        """
+        Create several runs and save them in one transaction.
 
-            # Handle structured output
-            if structured_output:
-                # Convert JSON schema to Pydantic model
-                OutputModel = jsonschema_to_pydantic(prompt_obj.output_schema)
-                
-                if has_image:
-                    # For multi-modal with structured output, use MultiModalLLMCompletionProgram
-                    
-                    # Add schema instructions to prompt
-                    formatted_prompt += "\n\nProvide your response in valid JSON format following this schema:\n"
-                    formatted_prompt += json.dumps(prompt_obj.output_schema, indent=2)
-                    
-                    program = MultiModalLLMCompletionProgram.from_defaults(
-                        output_parser=PydanticOutputParser(OutputModel),
-                        image_documents=image_documents,
-                        prompt_template_str=formatted_prompt,
-                        multi_modal_llm=llm,
-                        verbose=True
-                    )
-                    response = program()
-                else:
-                    # For text-only structured output, use regular structured LLM
-                    llm = llm.as_structured_llm(OutputModel)
-                    # Add schema instructions to prompt
-                    formatted_prompt += "\n\nProvide your response in valid JSON format following this schema:\n"
-                    formatted_prompt += json.dumps(prompt_obj.output_schema, indent=2)
-                    kwargs = {
-                        "temperature": prompt_obj.temperature,
-                    }
-
-                    # Add max_tokens only if it's not 0 or None
-                    if prompt_obj.max_tokens:
-                        kwargs["max_tokens"] = prompt_obj.max_tokens
-
-                    response = llm.complete(formatted_prompt, **kwargs)
-            else:
-                # Regular completion without structured output
-                if has_image:
-                    # program = MultiModalLLMCompletionProgram.from_defaults(
-                    #     image_documents=image_documents,
-                    #     prompt_template_str=formatted_prompt,
-                    #     multi_modal_llm=llm,
-                    #     verbose=True
-                    # )
-                    # response = program()
-                    response = llm.complete(
-                        prompt=formatted_prompt,
-                        image_documents=image_documents,
-                        temperature=prompt_obj.temperature,
-                        # max_tokens=prompt_obj.max_tokens
-                    )
-                else:
-                    kwargs = {
-                        "temperature": prompt_obj.temperature,
-                    }
+        Prompts are loaded one run after another, since the request's
+        AsyncSession cannot run queries concurrently. The LLM calls, which
+        touch no session, then run concurrently, at most
+        BULK_RUN_CONCURRENCY at a time. The records are inserted in a single
+        flush and commit instead of one commit per run.
+        """
+        try:
+            prepared = [
+                await self._prepare_run(
+                    run_in.prompt_id,
+                    run_in.project_id,
+                    run_in.input_variables,
+                    run_in.structured_output,
+                    run_in.model,
+                    run_in.version
+                )
+                for run_in in runs_in
+            ]
+            semaphore = asyncio.Semaphore(settings.BULK_RUN_CONCURRENCY)
 
-                    # Add max_tokens only if it's not 0 or None
-                    if prompt_obj.max_tokens:
-                        kwargs["max_tokens"] = prompt_obj.max_tokens
+            async def finish(run: _PreparedRun) -> Run:
+                async with semaphore:
+                    return await self._finish_run(run)
 
-                    response = llm.complete(formatted_prompt, **kwargs)
-            # Clean up temp files if we have images
-            if has_image:
-                for doc in image_documents:
-                    temp_file = doc.metadata.get('temp_file')
-                    if temp_file and os.path.exists(temp_file):
-                        os.remove(temp_file)
-
-            # Calculate latency
-            latency_ms = int((time.time() - start_time) * 1000)
-
-            # Process output based on response type
-            if has_image and structured_output:
-                # For MultiModalLLMCompletionProgram, response is already a Pydantic model
-                output = response.model_dump_json()
-            else:
-                # For regular completion or text-only structured output
-                output = response.text
-                if structured_output:
-                    try:
-                        # Response is already validated by structured LLM
-                        output_json = json.loads(output)
-                        # Just convert to string for storage
-                        output = json.dumps(output_json)
-                    except json.JSONDecodeError:
-                        logger.warning(f"Expected JSON output but got: {output}")
-                        raise AppException(
-                            status_code=400,
-                            detail="Failed to get structured JSON output",
-                            error_code="INVALID_JSON_OUTPUT"
-                        )
-
-            tokens = self.llama_service.get_token_counts()
-            self.llama_service.reset_token_counter()
-
-            # Create run record
-            db_run = Run(
-                prompt_id=prompt_id,
-                project_id=project_id,
-                version=used_version,
-                input_variables=input_variables,
-                output=output,
-                model=model,
-                prompt_tokens=tokens['prompt_tokens'] or 0,
-                completion_tokens=tokens['completion_tokens'] or 0,
-                total_tokens=tokens['total_tokens'] or 0,
-                latency_ms=latency_ms,
-                run_metadata={
-                    "structured_output": structured_output,
-                    "has_images": has_image,
-                    "timestamp": datetime.now(timezone.utc).isoformat()
-                }
-            )
-            
-            self.db.add(db_run)
-            self.db.commit()
-            self.db.refresh(db_run)
-            
-            return db_run
-            
+            db_runs = list(await asyncio.gather(*map(finish, prepared)))
+            self.db.add_all(db_runs)
+            await self.db.commit()
+            return db_runs
         except NotFoundError:
             raise
         except ValidationError:
@@ -229,19 +172,261 @@ class RunService:
         except AppException:
             raise
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             raise AppException(
                 status_code=500,
                 detail=f"Error creating run: {str(e)}",
                 error_code="RUN_CREATION_ERROR"
             )
 
-    def get_runs_by_prompt(
+    async def _execute_run(
+        self,
+        prompt_id: int,
+        project_id: int,
+        input_variables: Dict,
+        structured_output: bool = False,
+        model: Optional[str] = None,
+        version: Optional[int] = None
+    ) -> Run:
+        """Call the LLM for one run and build its unsaved record"""
+        return await self._finish_run(await self._prepare_run(
+            prompt_id, project_id, input_variables, structured_output, model, version
+        ))
+
+    async def _prepare_run(
+        self,
+        prompt_id: int,
+        project_id: int,
+        input_variables: Dict,
+        structured_output: bool = False,
+        model: Optional[str] = None,
+        version: Optional[int] = None
+    ) -> _PreparedRun:
+        """Load and validate everything a run needs from the database"""
+        # Get the prompt and its version
+        prompt_obj = await self.prompt_service.get(prompt_id)
+        if not prompt_obj:
+            raise NotFoundError(f"Prompt {prompt_id} not found")
+
+        # Then handle versioning if specified
+        if version is not None:
+            if version != prompt_obj.current_version:
+                prompt_version = await self.prompt_service.get_version(prompt_id, version)
+                if not prompt_version:
+                    raise NotFoundError(f"Version {version} of prompt {prompt_id} not found")
+                prompt_obj = prompt_version
+
+        # Store the version we're using
+        used_version = version if version is not None else prompt_obj.current_version
+
+        # Validate structured output requirements
+        if structured_output:
+            if not prompt_obj.output_schema:
+                raise ValidationError("Structured output requested but prompt has no output schema defined")
+
+        # Determine if we have any image variables and process them
+        has_image = False
+        image_documents = []
+        for var in prompt_obj.variables:
+            if var.get("type") == VariableType.IMAGE:
+                has_image = True
+                var_name = var.get("name")
+                if var_name not in input_variables:
+                    raise ValidationError(f"Missing required image variable: {var_name}")
+                
+                image_doc = self.llama_service.process_image(input_variables[var_name])
+                image_documents.append(image_doc)
+
+        # Get appropriate model based on variable types
+        if model is None:
+            if has_image:
+                system = await self.llm_system_service.get_default()
+                if not system or not system.default_multimodal:
+                    raise ValidationError("No default multimodal model configured")
+                model = system.default_multimodal
+            else:
+                system = await self.llm_system_service.get_default()
+                if not system:
+                    raise ValidationError("No default LLM system configured")
+                model = system.default_model
+
+        # Format prompt with variables
+        if not has_image:
+            formatted_prompt = get_prompt_template(prompt_obj.content).format(**input_variables)
+        else:
+            formatted_prompt = prompt_obj.content
+
+        return _PreparedRun(
+            prompt_id, project_id, input_variables, structured_output, model, used_version,
+            prompt_obj, formatted_prompt, has_image, image_documents
+        )
+
+    async def _finish_run(self, run: _PreparedRun) -> Run:
+        """
+        Call the LLM for a prepared run and build its unsaved record
+
+        Uses no database session, so several runs can finish concurrently.
+        """
+        (prompt_id, project_id, input_variables, structured_output, model, used_version,
+         prompt_obj, formatted_prompt, has_image, image_documents) = run
+
+        # Identical runs can reuse a recent output instead of calling the LLM
+        cache_key = None
+        cached_output = None
+        if settings.RUN_CACHE_TTL_SECONDS:
+            cache_key = _run_cache_key(
+                prompt_id, used_version, input_variables, formatted_prompt, prompt_obj.output_schema,
+                model, structured_output, prompt_obj.temperature, prompt_obj.max_tokens
+            )
+            cached_output = await get_cached(cache_key)
+
+        if cached_output is not None:
+            output = cached_output.decode()
+            tokens = _NO_TOKENS
+            latency_ms = 0
+        else:
+            output, tokens, latency_ms = await self._complete(
+                prompt_obj, model, formatted_prompt, structured_output, has_image, image_documents
+            )
+            if cache_key is not None:
+                await set_cached(cache_key, output.encode(), settings.RUN_CACHE_TTL_SECONDS)
+
+        # Create run record
+        db_run = Run(
+            prompt_id=prompt_id,
+            project_id=project_id,
+            version=used_version,
+            input_variables=input_variables,
+            output=output,
+            model=model,
+            prompt_tokens=tokens['prompt_tokens'] or 0,
+            completion_tokens=tokens['completion_tokens'] or 0,
+            total_tokens=tokens['total_tokens'] or 0,
+            latency_ms=latency_ms,
+            run_metadata={
+                "structured_output": structured_output,
+                "has_images": has_image,
+                "cached": cached_output is not None,
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            }
+        )
+        
+        return db_run
+
+    async def _complete(
+        self,
+        prompt_obj: Union[Prompt, PromptVersion],
+        model: str,
+        formatted_prompt: str,
+        structured_output: bool,
+        has_image: bool,
+        image_documents: List[ImageDocument]
+    ) -> Tuple[str, Dict[str, int], int]:
+        """Call the LLM and return its output, token counts and latency in ms"""
+        # Create LLM instance
+        llm = await self.llama_service.get_llm(model, is_multimodal=has_image)
+
+        # Start timing before LLM operations
+        start_time = time.perf_counter_ns()
+
+        # Handle structured output
+        if structured_output:
+            # Convert JSON schema to Pydantic model. JSONB returns keys in
+            # a canonical order, so the plain dump is a stable cache key
+            schema_json = orjson.dumps(prompt_obj.output_schema).decode()
+            OutputModel = _output_model_for(schema_json)
+            
+            if has_image:
+                # For multi-modal with structured output, use MultiModalLLMCompletionProgram
+                
+                # Add schema instructions to prompt
+                formatted_prompt += _schema_instructions(schema_json)
+                
+                program = MultiModalLLMCompletionProgram.from_defaults(
+                    output_parser=PydanticOutputParser(OutputModel),
+                    image_documents=image_documents,
+                    prompt_template_str=formatted_prompt,
+                    multi_modal_llm=llm,
+                    verbose=True
+                )
+                response = await program.acall()
+            else:
+                # For text-only structured output, use regular structured LLM
+                llm = llm.as_structured_llm(OutputModel)
+                # Add schema instructions to prompt
+                formatted_prompt += _schema_instructions(schema_json)
+                kwargs = {
+                    "temperature": prompt_obj.temperature,
+                }
+
+                # Add max_tokens only if it's not 0 or None
+                if prompt_obj.max_tokens:
+                    kwargs["max_tokens"] = prompt_obj.max_tokens
+
+                response = await llm.acomplete(formatted_prompt, **kwargs)
+        else:
+            # Regular completion without structured output
+            if has_image:
+                # program = MultiModalLLMCompletionProgram.from_defaults(
+                #     image_documents=image_documents,
+                #     prompt_template_str=formatted_prompt,
+                #     multi_modal_llm=llm,
+                #     verbose=True
+                # )
+                # response = program()
+                response = await llm.acomplete(
+                    prompt=formatted_prompt,
+                    image_documents=image_documents,
+                    temperature=prompt_obj.temperature,
+                    # max_tokens=prompt_obj.max_tokens
+                )
+            else:
+                kwargs = {
+                    "temperature": prompt_obj.temperature,
+                }
+
+                # Add max_tokens only if it's not 0 or None
+                if prompt_obj.max_tokens:
+                    kwargs["max_tokens"] = prompt_obj.max_tokens
+
+                response = await llm.acomplete(formatted_prompt, **kwargs)
+        # Calculate latency
+        latency_ms = (time.perf_counter_ns() - start_time) // 1_000_000
+
+        # Process output based on response type
+        if has_image and structured_output:
+            # For MultiModalLLMCompletionProgram, response is already a Pydantic model
+            output = response.model_dump_json()
+        else:
+            # For regular completion or text-only structured output
+            output = response.text
+            if structured_output:
+                try:
+                    # Response is already validated by structured LLM
+                    output_json = orjson.loads(output)
+                    # Just convert to compact JSON for storage
+                    output = orjson.dumps(output_json).decode()
+                except orjson.JSONDecodeError:
+                    logger.warning(f"Expected JSON output but got: {output}")
+                    raise AppException(
+                        status_code=400,
+                        detail="Failed to get structured JSON output",
+                        error_code="INVALID_JSON_OUTPUT"
+                    )
+
+        tokens = self.llama_service.get_token_counts(
+            response, getattr(llm, "model", model), formatted_prompt, output
+        )
+
+        return output, tokens, latency_ms
+
+    async def get_runs_by_prompt(
         self,
         prompt_id: int,
         skip: int = 0,
         limit: int = 100,
-        order_by_latest: bool = True
+        order_by_latest: bool = True,
+        cursor: Optional[Tuple[datetime, int]] = None
     ) -> Sequence[Run]:
         """
         Get all runs for a specific prompt.
@@ -251,6 +436,8 @@ class RunService:
             skip: Number of records to skip (for pagination)
             limit: Maximum number of records to return
             order_by_latest: If True, returns latest runs first
+            cursor: Keyset cursor, the (created_at, id) of the previous page's
+                last run. When given, skip is ignored
 
         Returns:
             List of runs for the prompt
@@ -260,24 +447,47 @@ class RunService:
             AppException: If database operation fails
         """
         try:
-            # First check if prompt exists
-            prompt = self.prompt_service.get(prompt_id)
-            if not prompt:
-                raise NotFoundError(f"Prompt {prompt_id} not found")
-
-            # Build query
-            query = self.db.query(Run).filter(Run.prompt_id == prompt_id)
+            # Build query; serialization only reads columns, so any lazy
+            # relationship load would be an accidental per-row query
+            query = select(Run).options(raiseload('*')).where(Run.prompt_id == prompt_id)
             
-            # Add ordering
+            # Add ordering; id breaks ties between runs inserted in one
+            # transaction, which share created_at
             if order_by_latest:
-                query = query.order_by(Run.created_at.desc())
+                query = query.order_by(Run.created_at.desc(), Run.id.desc())
             else:
-                query = query.order_by(Run.created_at.asc())
+                query = query.order_by(Run.created_at.asc(), Run.id.asc())
             
-            # Add pagination
-            query = query.offset(skip).limit(limit)
+            # Add pagination - keyset when a cursor is given, offset otherwise
+            if cursor is not None:
+                cursor_created_at, cursor_id = cursor
+                # created_at is timestamptz; read naive cursors as UTC
+                if cursor_created_at.tzinfo is None:
+                    cursor_created_at = cursor_created_at.replace(tzinfo=timezone.utc)
+                position = tuple_(Run.created_at, Run.id)
+                if order_by_latest:
+                    query = query.where(position < tuple_(cursor_created_at, cursor_id))
+                else:
+                    query = query.where(position > tuple_(cursor_created_at, cursor_id))
+            else:
+                query = query.offset(skip)
+            query = query.limit(limit)
             
-            return query.all()
+            # Large pages are streamed through a server-side cursor in
+            # DB_FETCH_SIZE batches instead of being buffered by the driver
+            if limit > settings.DB_FETCH_SIZE:
+                result = await self.db.stream_scalars(
+                    query.execution_options(yield_per=settings.DB_FETCH_SIZE)
+                )
+                runs = [run async for run in result]
+            else:
+                result = await self.db.execute(query)
+                runs = result.scalars().all()
+
+            # Only an empty page needs the existence check: runs imply a prompt
+            if not runs and not await self.prompt_service.get(prompt_id):
+                raise NotFoundError(f"Prompt {prompt_id} not found")
+            return runs
 
         except SQLAlchemyError as e:
             logger.error(f"Database error retrieving runs for prompt {prompt_id}: {str(e)}")
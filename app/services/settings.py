@@ -1,28 +1,100 @@
-from typing import Optional, List
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Sequence
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from loguru import logger
 
 from app.models.settings import Setting, SettingType
 from app.schemas.settings import SettingCreate, SettingUpdate
+from app.core.database import READ_BIND_ARGUMENTS, bulk_insert
 from app.core.exceptions import AppException, NotFoundError, ValidationError
+from app.core.security import encrypt_value
 
 
 class SettingsService:
     """Service for managing application settings"""
+    __slots__ = ("db", "_in_unit_of_work")
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
+        self._in_unit_of_work = False
 
-    def get(self, setting_id: int) -> Optional[Setting]:
-        """Get a setting by ID"""
-        return self.db.query(Setting).filter(Setting.id == setting_id).first()
+    @asynccontextmanager
+    async def unit_of_work(self, error_detail: str = "Failed to save settings") -> AsyncIterator[None]:
+        """
+        Group setting writes into one transaction
+
+        Commits once when the outermost block exits. The blocks inside each
+        write method join an enclosing one, so several writes made within
+        `async with service.unit_of_work():` share a single commit. Any
+        error rolls the whole unit back; database errors surface as
+        AppException.
+
+        Args:
+            error_detail: Message for the AppException raised on database errors
+        """
+        if self._in_unit_of_work:
+            yield
+            return
+
+        self._in_unit_of_work = True
+        try:
+            yield
+            await self.db.commit()
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.error(f"{error_detail}: {str(e)}")
+            raise AppException(
+                status_code=500,
+                detail=error_detail,
+                error_code="DB_ERROR"
+            )
+        except Exception:
+            await self.db.rollback()
+            raise
+        finally:
+            self._in_unit_of_work = False
+
+    async def get(self, setting_id: int) -> Optional[Setting]:
+        """Get a setting by ID, from the read replica when one is configured"""
+        result = await self.db.execute(
+            select(Setting).where(Setting.id == setting_id), bind_arguments=READ_BIND_ARGUMENTS
+        )
+        return result.scalar_one_or_none()
 
-    def get_by_key(self, key: str) -> Optional[Setting]:
-        """Get a setting by its key"""
-        return self.db.query(Setting).filter(Setting.key == key).first()
+    async def get_last_modified(self, setting_id: int) -> Optional[datetime]:
+        """Get when a setting was last modified without loading it, from the same bind as get"""
+        return await self.db.scalar(
+            select(Setting.updated_at).where(Setting.id == setting_id),
+            bind_arguments=READ_BIND_ARGUMENTS
+        )
 
-    def get_decrypted_value(self, key: str) -> str:
+    async def get_by_key(self, key: str) -> Optional[Setting]:
+        """Get a setting by its key, from the read replica when one is configured"""
+        result = await self.db.execute(
+            select(Setting).where(Setting.key == key), bind_arguments=READ_BIND_ARGUMENTS
+        )
+        return result.scalars().first()
+
+    async def get_by_keys(self, keys: Sequence[str]) -> Dict[str, Setting]:
+        """Get several settings in one query, keyed by setting key"""
+        result = await self.db.scalars(select(Setting).where(Setting.key.in_(keys)))
+        return {setting.key: setting for setting in result}
+
+    async def get_decrypted_values(self, keys: Sequence[str]) -> Dict[str, str]:
+        """
+        Get the decrypted values of several settings with a single query
+
+        Like get_decrypted_value, this is for internal use only. Keys
+        without a setting are left out of the result.
+        """
+        found = await self.get_by_keys(keys)
+        return {key: setting.get_decrypted_value() for key, setting in found.items()}
+
+    async def get_decrypted_value(self, key: str) -> str:
         """
         Get the actual decrypted value for a setting
         
@@ -38,16 +110,17 @@ class SettingsService:
         Raises:
             NotFoundError: If setting doesn't exist
         """
-        setting = self.get_by_key(key)
+        setting = await self.get_by_key(key)
         if not setting:
             raise NotFoundError(f"Setting with key '{key}' not found")
         return setting.get_decrypted_value()
 
-    def list_all(self) -> List[Setting]:
-        """List all settings"""
-        return self.db.query(Setting).all()
+    async def list_all(self) -> List[Setting]:
+        """List all settings, from the read replica when one is configured"""
+        result = await self.db.execute(select(Setting), bind_arguments=READ_BIND_ARGUMENTS)
+        return list(result.scalars().all())
 
-    def create(self, setting: SettingCreate) -> Setting:
+    async def create(self, setting: SettingCreate) -> Setting:
         """
         Create a new setting
         
@@ -61,35 +134,55 @@ class SettingsService:
             ValidationError: If setting with key already exists
             AppException: If database operation fails
         """
-        try:
-            # Check if key already exists
-            if self.get_by_key(setting.key):
+        async with self.unit_of_work("Failed to create setting"):
+            # A taken key inserts nothing and returns no row, so there is no
+            # separate existence check to race with concurrent creates
+            db_setting = await self.db.scalar(
+                pg_insert(Setting)
+                .values(
+                    key=setting.key,
+                    type=setting.type,
+                    description=setting.description,
+                    encrypted_value=encrypt_value(setting.value)
+                )
+                .on_conflict_do_nothing(index_elements=[Setting.key])
+                .returning(Setting)
+            )
+            if db_setting is None:
                 raise ValidationError(f"Setting with key '{setting.key}' already exists")
 
-            # Create new setting
-            db_setting = Setting(
-                key=setting.key,
-                type=setting.type,
-                description=setting.description
-            )
-            # Set value through property to trigger encryption
-            db_setting.value = setting.value
+        return db_setting
 
-            self.db.add(db_setting)
-            self.db.commit()
-            self.db.refresh(db_setting)
+    async def bulk_create(self, settings_in: Sequence[SettingCreate]) -> None:
+        """
+        Create many settings at once, e.g. when seeding or importing
 
-            return db_setting
+        Values are encrypted up front and the rows are written with
+        multi-row INSERTs in a single transaction.
 
-        except SQLAlchemyError as e:
-            logger.error(f"Error creating setting: {str(e)}")
-            raise AppException(
-                status_code=500,
-                detail="Failed to create setting",
-                error_code="DB_ERROR"
-            )
+        Args:
+            settings_in: Settings to create
 
-    def update(self, setting_id: int, setting: SettingUpdate) -> Setting:
+        Raises:
+            ValidationError: If any key already exists
+            AppException: If database operation fails
+        """
+        rows = [
+            {
+                "key": setting.key,
+                "type": setting.type,
+                "description": setting.description,
+                "encrypted_value": encrypt_value(setting.value)
+            }
+            for setting in settings_in
+        ]
+        async with self.unit_of_work("Failed to create settings"):
+            try:
+                await bulk_insert(self.db, Setting, rows)
+            except IntegrityError:
+                raise ValidationError("One or more setting keys already exist")
+
+    async def update(self, setting_id: int, setting: SettingUpdate) -> Setting:
         """
         Update a setting
         
@@ -104,31 +197,33 @@ class SettingsService:
             NotFoundError: If setting not found
             AppException: If database operation fails
         """
-        try:
-            db_setting = self.get(setting_id)
+        # Update fields if provided
+        values = {}
+        if setting.value is not None:
+            values["encrypted_value"] = encrypt_value(setting.value)
+        if setting.description is not None:
+            values["description"] = setting.description
+        if not values:
+            db_setting = await self.db.get(Setting, setting_id)
             if not db_setting:
                 raise NotFoundError(f"Setting {setting_id} not found")
-
-            # Update fields if provided
-            if setting.value is not None:
-                db_setting.value = setting.value
-            if setting.description is not None:
-                db_setting.description = setting.description
-
-            self.db.commit()
-            self.db.refresh(db_setting)
-
             return db_setting
 
-        except SQLAlchemyError as e:
-            logger.error(f"Error updating setting {setting_id}: {str(e)}")
-            raise AppException(
-                status_code=500,
-                detail="Failed to update setting",
-                error_code="DB_ERROR"
+        async with self.unit_of_work("Failed to update setting"):
+            # One UPDATE ... RETURNING instead of load, flush and refresh
+            db_setting = await self.db.scalar(
+                update(Setting)
+                .where(Setting.id == setting_id)
+                .values(**values)
+                .returning(Setting)
+                .execution_options(populate_existing=True)
             )
+            if not db_setting:
+                raise NotFoundError(f"Setting {setting_id} not found")
+
+        return db_setting
 
-    def delete(self, setting_id: int):
+    async def delete(self, setting_id: int):
         """
         Delete a setting
         
@@ -139,23 +234,15 @@ class SettingsService:
             NotFoundError: If setting not found
             AppException: If database operation fails
         """
-        try:
-            db_setting = self.get(setting_id)
+        async with self.unit_of_work("Failed to delete setting"):
+            # Loaded from the primary, since it is about to be deleted
+            db_setting = await self.db.get(Setting, setting_id)
             if not db_setting:
                 raise NotFoundError(f"Setting {setting_id} not found")
 
-            self.db.delete(db_setting)
-            self.db.commit()
-
-        except SQLAlchemyError as e:
-            logger.error(f"Error deleting setting {setting_id}: {str(e)}")
-            raise AppException(
-                status_code=500,
-                detail="Failed to delete setting",
-                error_code="DB_ERROR"
-            )
+            await self.db.delete(db_setting)
 
-    def get_api_key(self, key: str) -> Optional[str]:
+    async def get_api_key(self, key: str) -> Optional[str]:
         """
         Get decrypted API key by its key name
         
@@ -165,7 +252,8 @@ class SettingsService:
         Returns:
             Decrypted API key or None if not found
         """
-        setting = self.get_by_key(key)
-        if setting and setting.type == SettingType.API_KEY:
-            return setting.value
-        return None
+        # Type filtered in SQL, so a non-API-key setting is never loaded
+        setting = await self.db.scalar(
+            select(Setting).where(Setting.key == key, Setting.type == SettingType.API_KEY)
+        )
+        return setting.value if setting else None
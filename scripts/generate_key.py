@@ -2,8 +2,14 @@
 """Generate Fernet key and update .env file"""
 
 import os
+import re
+import shutil
+import tempfile
 from cryptography.fernet import Fernet
 
+_FERNET_KEY_RE = re.compile(r'^FERNET_KEY=.*$', re.MULTILINE)
+_SECURITY_HEADER_RE = re.compile(r'^[ \t]*# Security[ \t]*$', re.MULTILINE)
+
 def generate_key():
     """Generate a new Fernet key"""
     return Fernet.generate_key().decode()
@@ -15,35 +21,33 @@ def update_env_file(key):
     # Read existing content
     if os.path.exists(env_path):
         with open(env_path, 'r') as f:
-            lines = f.readlines()
+            content = f.read()
     else:
-        lines = []
+        content = ''
 
-    # Find FERNET_KEY line if it exists
-    key_line = f'FERNET_KEY={key}\n'
-    fernet_key_found = False
-    
-    for i, line in enumerate(lines):
-        if line.startswith('FERNET_KEY='):
-            lines[i] = key_line
-            fernet_key_found = True
-            break
+    # Replace the FERNET_KEY line in place if it exists
+    key_line = f'FERNET_KEY={key}'
+    content, replaced = _FERNET_KEY_RE.subn(lambda _: key_line, content, count=1)
     
     # If FERNET_KEY not found, add it with a section header
-    if not fernet_key_found:
+    if not replaced:
         # Add a blank line if file doesn't end with one
-        if lines and not lines[-1].isspace():
-            lines.append('\n')
+        if content and not content.endswith('\n\n'):
+            content += '\n'
         
         # Add security section if not present
-        if not any(line.strip() == '# Security' for line in lines):
-            lines.extend(['\n# Security\n'])
+        if not _SECURITY_HEADER_RE.search(content):
+            content += '\n# Security\n'
         
-        lines.append(key_line)
+        content += key_line + '\n'
 
-    # Write back to file
-    with open(env_path, 'w') as f:
-        f.writelines(lines)
+    # Write to a temporary file and swap it in, so a crash mid-write
+    # cannot leave a truncated .env behind
+    with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(env_path), delete=False) as f:
+        f.write(content)
+    if os.path.exists(env_path):
+        shutil.copymode(env_path, f.name)
+    os.replace(f.name, env_path)
 
 if __name__ == '__main__':
     key = generate_key()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Import settings from a JSON file, e.g. when seeding a new deployment
+
+The file holds a list of objects with key, type, value and optional
+description fields, for example:
+
+    [{"key": "OPENAI_API_KEY", "type": "api_key", "value": "sk-..."}]
+
+All settings are created in one transaction, so if any key already
+exists none are imported.
+"""
+
+import asyncio
+import json
+import os
+import sys
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter
+
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import AppException
+from app.schemas.settings import SettingCreate
+from app.services.settings import SettingsService
+
+_SETTINGS_ADAPTER = TypeAdapter(List[SettingCreate])
+
+
+def load_settings(path: str) -> List[SettingCreate]:
+    """Read and validate the settings in a JSON file"""
+    with open(path, 'rb') as f:
+        return _SETTINGS_ADAPTER.validate_json(f.read())
+
+
+async def import_settings(path: str) -> int:
+    """Create every setting in the file and return how many were imported"""
+    settings_in = load_settings(path)
+    async with AsyncSessionLocal() as db:
+        await SettingsService(db).bulk_create(settings_in)
+    return len(settings_in)
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        sys.exit(f'Usage: {sys.argv[0]} <settings.json>')
+    try:
+        count = asyncio.run(import_settings(sys.argv[1]))
+    except AppException as e:
+        sys.exit(f'Failed to import settings: {e.detail}')
+    print(f'Imported {count} settings from {sys.argv[1]}')
@@ -0,0 +1,31 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("FERNET_KEY", "cAoEx4CW02tjD0ubHNPZygSZNE8K9eXtVTx2ggwR42w=")
+
+import pytest
+
+from app.api.v1.endpoints.runs import _decode_cursor, _encode_cursor
+from app.core.exceptions import ValidationError
+
+
+@pytest.mark.parametrize("created_at", [
+    datetime(2024, 12, 27, 17, 10, tzinfo=timezone.utc),
+    datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc),
+    datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+])
+def test_cursor_round_trips(created_at):
+    cursor = _encode_cursor(created_at, 42)
+    assert cursor.replace("-", "").replace("_", "").isalnum()
+    assert _decode_cursor(cursor) == (created_at, 42)
+
+
+def test_naive_created_at_is_read_as_utc():
+    cursor = _encode_cursor(datetime(2024, 12, 27, 17, 10), 7)
+    assert _decode_cursor(cursor) == (datetime(2024, 12, 27, 17, 10, tzinfo=timezone.utc), 7)
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "2024-12-27T17:10:00Z_42", "!!!"])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(ValidationError):
+        _decode_cursor(cursor)
@@ -0,0 +1,123 @@
+import asyncio
+import os
+
+os.environ.setdefault("FERNET_KEY", "cAoEx4CW02tjD0ubHNPZygSZNE8K9eXtVTx2ggwR42w=")
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.core.exceptions import ValidationError
+from app.core.security import decrypt_value
+from app.models.settings import Setting, SettingType
+from app.schemas.settings import SettingCreate
+from app.services import settings as settings_module
+from app.services.settings import SettingsService
+
+
+class _Result:
+    def __init__(self, value):
+        self._value = value
+
+    def scalar_one_or_none(self):
+        return self._value
+
+
+class _FakeSession:
+    """Records each statement a service issues and the bind it is issued with"""
+
+    def __init__(self, *settings):
+        self.settings = list(settings)
+        self.statements = []
+        self.bind_arguments = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def _record(self, statement, bind_arguments):
+        self.statements.append(statement)
+        self.bind_arguments.append(bind_arguments)
+
+    @property
+    def setting(self):
+        return self.settings[0] if self.settings else None
+
+    async def execute(self, statement, params=None, *, bind_arguments=None, **kw):
+        self._record(statement, bind_arguments)
+        return _Result(self.setting)
+
+    async def scalar(self, statement, params=None, *, bind_arguments=None, **kw):
+        self._record(statement, bind_arguments)
+        return self.setting.updated_at if self.setting else None
+
+    async def scalars(self, statement, params=None, *, bind_arguments=None, **kw):
+        self._record(statement, bind_arguments)
+        return iter(self.settings)
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+def _setting(key, value):
+    setting = Setting(key=key, type=SettingType.CONFIG)
+    setting.value = value
+    return setting
+
+
+@pytest.mark.parametrize("bind_arguments", [None, {"bind": object()}], ids=["primary", "replica"])
+def test_get_reads_validator_and_body_from_same_bind(monkeypatch, bind_arguments):
+    monkeypatch.setattr(settings_module, "READ_BIND_ARGUMENTS", bind_arguments)
+    setting = Setting(id=1, key="OPENAI_API_KEY")
+    session = _FakeSession(setting)
+    service = SettingsService(session)
+
+    async def read():
+        await service.get_last_modified(1)
+        return await service.get(1)
+
+    assert asyncio.run(read()) is setting
+    assert session.bind_arguments == [bind_arguments, bind_arguments]
+
+
+def test_get_returns_none_for_missing_setting(monkeypatch):
+    monkeypatch.setattr(settings_module, "READ_BIND_ARGUMENTS", None)
+    assert asyncio.run(SettingsService(_FakeSession()).get(1)) is None
+
+
+def test_get_decrypted_values_issues_one_statement():
+    session = _FakeSession(_setting("a", "one"), _setting("b", "two"), _setting("c", "three"))
+
+    values = asyncio.run(SettingsService(session).get_decrypted_values(["a", "b", "c"]))
+
+    assert values == {"a": "one", "b": "two", "c": "three"}
+    assert len(session.statements) == 1
+
+
+def test_bulk_create_inserts_encrypted_rows_in_one_commit():
+    session = _FakeSession()
+    settings_in = [
+        SettingCreate(key=f"KEY_{i}", type=SettingType.CONFIG, value=f"value {i}") for i in range(3)
+    ]
+
+    asyncio.run(SettingsService(session).bulk_create(settings_in))
+
+    assert len(session.statements) == 1
+    assert session.commits == 1
+    rows = session.statements[0].compile().params
+    values = sorted(decrypt_value(v) for k, v in rows.items() if k.startswith("encrypted_value"))
+    assert values == ["value 0", "value 1", "value 2"]
+
+
+def test_bulk_create_rejects_existing_keys():
+    class _ConflictSession(_FakeSession):
+        async def execute(self, statement, params=None, **kw):
+            raise IntegrityError(str(statement), params, Exception("duplicate key"))
+
+    session = _ConflictSession()
+    settings_in = [SettingCreate(key="KEY", type=SettingType.CONFIG, value="value")]
+
+    with pytest.raises(ValidationError):
+        asyncio.run(SettingsService(session).bulk_create(settings_in))
+    assert session.commits == 0
+    assert session.rollbacks == 1